@@ -0,0 +1,64 @@
+import pygame
+
+
+class AssetManager:
+    """Loads every image once, on first use, and shares it between classes.
+
+    Images are converted to the display's pixel format as they are loaded so
+    blits don't pay for a conversion, and scaled copies are cached by size.
+    """
+
+    def __init__(self):
+        self.images = {}
+        self.scaled_images = {}
+
+    def image(self, path):
+        image = self.images.get(path)
+        if image is None:
+            image = pygame.image.load(path)
+            # Converting needs a display mode, headless loads keep the file format
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha()
+            self.images[path] = image
+        return image
+
+    def scaled(self, path, size):
+        key = (path, size)
+        image = self.scaled_images.get(key)
+        if image is None:
+            image = pygame.transform.scale(self.image(path), size)
+            self.scaled_images[key] = image
+        return image
+
+    def texture_set(self, paths):
+        return TextureSet(self, paths)
+
+
+class TextureSet:
+    """A name to image mapping that only loads an image when it is asked for."""
+
+    def __init__(self, manager, paths):
+        self.manager = manager
+        self.paths = paths
+
+    def __getitem__(self, name):
+        return self.manager.image(self.paths[name])
+
+    def __contains__(self, name):
+        return name in self.paths
+
+    def get(self, name, default=None):
+        if name not in self.paths:
+            return default
+        return self[name]
+
+    def scaled(self, name, size):
+        return self.manager.scaled(self.paths[name], size)
+
+    def preload(self):
+        """Loads every image in the set now instead of on first use."""
+        for path in self.paths.values():
+            self.manager.image(path)
+
+
+asset_manager = AssetManager()
@@ -0,0 +1,269 @@
+"""Headless benchmarks for world generation, player physics and rendering.
+
+Runs the game on SDL's dummy video and audio drivers, so no window opens:
+
+    python benchmark.py
+    python benchmark.py --terrain python numpy --sizes 16 64 --frames 300
+    python benchmark.py --terrain-render scroll full
+    python benchmark.py --entities 1000 5000
+    python benchmark.py --net-clients 1 4 8
+
+The frame benchmark draws a view as wide and tall as the render distance,
+so each distance loads and bakes everything it covers, and reports the
+memory held by the loaded chunks and their baked sections.
+"""
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import socket
+import statistics
+import time
+import tracemalloc
+
+import pygame
+from blocks import AIR, BLOCK_DROP, TOOLS, get_dig_tool
+from camera import Camera
+from entities import ITEM, MOB
+from input_trace import TraceKeys, get_key_mask
+from inventory import HOTBAR_KEYS
+from main import Game
+from net import Connection, INPUT, CLICK, INPUT_DATA, CLICK_DATA
+from server import Server
+from world import World
+
+
+def scripted_keys(frame):
+    # Keep walking right and hopping over steps, sprinting every other two seconds
+    keys = TraceKeys(0)
+    keys.pressed.update([pygame.K_d, pygame.K_SPACE])
+    if (frame // 120) % 2 == 1:
+        keys.pressed.add(pygame.K_LSHIFT)
+    return keys
+
+
+def clear_path(game):
+    # Dig through whatever stopped the player, like someone playing would
+    world, camera = game.world, game.camera
+    tile_x, tile_y = game.player.get_pos()
+    for tile_pos in [(tile_x + 1, tile_y), (tile_x + 1, tile_y - 1)]:
+        block_id = world.get_block_id(*tile_pos)
+        if block_id != AIR:
+            x = tile_pos[0] * world.tile_size - camera.offset.x + world.tile_size // 2
+            y = tile_pos[1] * world.tile_size - camera.offset.y + world.tile_size // 2
+            world.break_block(camera, game.player, x, y, get_dig_tool(block_id))
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return statistics.mean(samples) * 1000, p99 * 1000, ordered[-1] * 1000
+
+
+def generate_world(terrain, chunk_count, seed):
+    world = World(seed=seed, terrain=terrain, workers=0)
+    for chunk_x in range(chunk_count):
+        if chunk_x not in world.chunks:
+            world.load_chunk(chunk_x)
+    return world
+
+
+def benchmark_generation(terrain, chunk_count, seed):
+    start = time.perf_counter()
+    generate_world(terrain, chunk_count, seed)
+    elapsed = time.perf_counter() - start
+
+    # Measured in a second pass since tracing allocations slows generation down
+    tracemalloc.start()
+    world = generate_world(terrain, chunk_count, seed)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del world
+    return elapsed * 1000, memory / 1024
+
+
+def get_world_memory(world):
+    """Bytes held by the loaded chunks' block and light grids, and by their baked section surfaces."""
+    chunk_bytes = 0
+    surface_bytes = 0
+    for chunk in world.chunks.values():
+        chunk_bytes += len(chunk.blocks) + sum(len(levels) for levels in chunk.light)
+        for surface in chunk.surfaces.values():
+            if surface is not None:
+                surface_bytes += surface.get_pitch() * surface.get_height()
+    return chunk_bytes, surface_bytes
+
+
+def benchmark_frames(terrain, render_distance, frames, seed, workers, terrain_render):
+    world = World(seed=seed, terrain=terrain, render_distance=render_distance, workers=workers)
+    game = Game(world, terrain_render=terrain_render)
+    # The view covers the whole render distance, so a farther one draws and bakes more
+    view_size = ((2 * render_distance + 1) * world.tile_size,) * 2
+    game.camera = Camera(*view_size)
+    target = pygame.Surface(view_size)
+    update_times = []
+    render_times = []
+
+    for frame in range(frames):
+        keys = scripted_keys(frame)
+        start = time.perf_counter()
+        game.world.update(game.player)
+        game.player.update(game.camera, game.world, keys)
+        game.camera.update(game.player)
+        update_times.append(time.perf_counter() - start)
+        if game.player.velocity.x == 0:
+            clear_path(game)
+
+        start = time.perf_counter()
+        if game.terrain_view is not None:
+            game.terrain_view.render(target, game.camera, game.player)
+        else:
+            game.world.render(target, game.camera, game.player)
+        game.player.render(target, game.camera)
+        render_times.append(time.perf_counter() - start)
+
+    memory = get_world_memory(world)
+    world.close()
+    return summarize(update_times), summarize(render_times), memory, game.player.get_pos()
+
+
+def benchmark_entities(count, frames, seed):
+    world = World(seed=seed, workers=0)
+    game = Game(world)
+    target = pygame.Surface(game.screen.get_size())
+    entities = world.entities
+    if entities is None:
+        world.close()
+        return None
+
+    # Drop a mix of items and mobs over the loaded chunks, a tenth of them mobs
+    rng = entities.random
+    drops = [i for i in BLOCK_DROP if i is not None]
+    player_x, player_y = game.player.rect.center
+    for i in range(count):
+        x = player_x + rng.uniform(-1500, 1500)
+        y = player_y - rng.uniform(0, 800)
+        if i % 10 == 0:
+            entities.spawn(MOB, x, y)
+        else:
+            entities.spawn(ITEM, x, y, vx=rng.uniform(-2, 2), item=drops[i % len(drops)])
+    # Keep them out of reach so the count stays the same throughout
+    entities.arrays['age'][:entities.count] = -frames - 1
+    entities.pickup_range = 0
+
+    update_times = []
+    render_times = []
+    for frame in range(frames):
+        start = time.perf_counter()
+        entities.update([game.player])
+        update_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        entities.render(target, game.camera)
+        render_times.append(time.perf_counter() - start)
+
+    world.close()
+    return summarize(update_times), summarize(render_times)
+
+
+def benchmark_server(client_count, ticks, seed):
+    server = Server(World(seed=seed, workers=0), port=0)
+    bots = [Connection(socket.create_connection(('127.0.0.1', server.port))) for _ in range(client_count)]
+    server.accept()
+    clients = list(server.clients.values())
+    tick_times = []
+
+    for tick in range(ticks):
+        for i, (bot, client) in enumerate(zip(bots, clients)):
+            # Half the players walk left, and all of them dig out of dead ends
+            keys = scripted_keys(tick)
+            direction = 1 if i % 2 == 0 else -1
+            if direction < 0:
+                keys.pressed.discard(pygame.K_d)
+                keys.pressed.add(pygame.K_a)
+            tile_x, tile_y = client.player.get_pos()
+            block_id = server.world.get_block_id(tile_x + direction, tile_y)
+            if tick % 10 == 0 and block_id != AIR:
+                tool = get_dig_tool(block_id)
+                if tool is not None:
+                    keys.pressed.add(HOTBAR_KEYS[TOOLS.index(tool)][0])
+            if tick % 10 == 1 and block_id != AIR:
+                tile_size = server.world.tile_size
+                bot.send(CLICK, CLICK_DATA.pack(1, (tile_x + direction) * tile_size + tile_size // 2,
+                                                tile_y * tile_size + tile_size // 2))
+            bot.send(INPUT, INPUT_DATA.pack(get_key_mask(keys)))
+            bot.flush()
+
+        start = time.perf_counter()
+        server.tick()
+        tick_times.append(time.perf_counter() - start)
+        for bot in bots:
+            bot.receive()
+
+    received = sum(bot.bytes_received for bot in bots)
+    for bot in bots:
+        bot.close()
+    server.close()
+    # Bytes each client would get a second at the real tick rate
+    per_client = received / client_count / (ticks / server.tick_rate)
+    return summarize(tick_times), per_client / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the game")
+    parser.add_argument('--terrain', nargs='+', default=['python', 'numpy'], help="terrain generator backends")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[8, 32, 128], help="world sizes in chunks")
+    parser.add_argument('--render-distances', nargs='+', type=int, default=[10, 25, 50])
+    parser.add_argument('--workers', nargs='+', type=int, default=[0, 1], help="background worker threads, 0 for none")
+    parser.add_argument('--terrain-render', nargs='+', default=['scroll', 'full'], choices=['scroll', 'full'])
+    parser.add_argument('--entities', nargs='+', type=int, default=[1000, 5000], help="dropped items and mobs")
+    parser.add_argument('--net-clients', nargs='+', type=int, default=[1, 4], help="players connected to a server")
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    # Assets are loaded relative to the game directory
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    pygame.init()
+    pygame.display.set_mode((800, 600))
+
+    for terrain in args.terrain:
+        for size in args.sizes:
+            elapsed, memory = benchmark_generation(terrain, size, args.seed)
+            print(f"generation  terrain={terrain:<6} chunks={size:<5} "
+                  f"time={elapsed:9.2f} ms  memory={memory:10.1f} KB")
+
+    for terrain in args.terrain:
+        for workers in args.workers:
+            for render_distance in args.render_distances:
+                for terrain_render in args.terrain_render:
+                    update, render, memory, pos = benchmark_frames(terrain, render_distance, args.frames, args.seed,
+                                                                   workers, terrain_render)
+                    print(f"frames      terrain={terrain:<6} workers={workers} render_distance={render_distance:<3} "
+                          f"terrain_render={terrain_render:<6} end={pos}")
+                    for name, (mean, p99, worst) in [('update', update), ('render', render)]:
+                        print(f"            {name:<6} mean={mean:7.3f} ms  p99={p99:7.3f} ms  max={worst:8.3f} ms")
+                    chunk_bytes, surface_bytes = memory
+                    print(f"            memory chunks={chunk_bytes / 1024:.1f} KB  sections={surface_bytes / 1024:.1f} KB")
+
+    for count in args.entities:
+        result = benchmark_entities(count, args.frames, args.seed)
+        if result is None:
+            print("entities    skipped, NumPy is not installed")
+            break
+        print(f"entities    count={count}")
+        for name, (mean, p99, worst) in zip(['update', 'render'], result):
+            print(f"            {name:<6} mean={mean:7.3f} ms  p99={p99:7.3f} ms  max={worst:8.3f} ms")
+
+    for client_count in args.net_clients:
+        (mean, p99, worst), per_client = benchmark_server(client_count, args.frames, args.seed)
+        print(f"server      clients={client_count:<3} sent={per_client:7.1f} KB/s per client")
+        print(f"            tick   mean={mean:7.3f} ms  p99={p99:7.3f} ms  max={worst:8.3f} ms")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
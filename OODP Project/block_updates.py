@@ -0,0 +1,121 @@
+import heapq
+import random
+
+from blocks import AIR, BLOCK_FALLS, BLOCK_DECAYS, BLOCK_HOLDS_LEAVES, BLOCK_FLUID_LEVEL, FLUID_IDS
+
+
+class BlockUpdates:
+    """Runs the blocks that change on their own: falling, decaying and flowing.
+
+    Nothing is scanned. A block change schedules its own cell and the cells
+    around it, and only cells whose block falls, decays or flows are kept.
+    Each tick runs at most max_updates_per_tick of the updates that are due
+    and leaves the rest for the next tick, so a big cascade is spread over
+    several frames.
+    """
+
+    def __init__(self, world):
+        self.world = world
+        self.tick_count = 0
+        self.max_updates_per_tick = 16
+        # Due tick, insertion order and cell of every scheduled update
+        self.queue = []
+        self.scheduled = set()
+        self.order = 0
+        # Seeded so the same clicks always give the same world
+        self.random = random.Random(world.seed)
+
+        self.fall_delay = 2
+        self.flow_delay = 5
+        self.decay_delay = (10, 60)
+        # Leaves stay while there is wood this many cells away or closer
+        self.leaf_range = 2
+        self.max_fluid_level = len(FLUID_IDS) - 1
+
+    def get_delay(self, block_id):
+        if BLOCK_FALLS[block_id]:
+            return self.fall_delay
+        if BLOCK_FLUID_LEVEL[block_id] is not None:
+            return self.flow_delay
+        if BLOCK_DECAYS[block_id]:
+            return self.random.randint(*self.decay_delay)
+        return None
+
+    def schedule(self, x, y):
+        if (x, y) in self.scheduled:
+            return
+        delay = self.get_delay(self.world.get_block_id(x, y))
+        if delay is None:
+            return
+        self.scheduled.add((x, y))
+        heapq.heappush(self.queue, (self.tick_count + delay, self.order, x, y))
+        self.order += 1
+
+    def block_changed(self, x, y, old_id):
+        for cell in [(x, y), (x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]:
+            self.schedule(*cell)
+        if BLOCK_HOLDS_LEAVES[old_id]:
+            for nx in range(x - self.leaf_range, x + self.leaf_range + 1):
+                for ny in range(y - self.leaf_range, y + self.leaf_range + 1):
+                    self.schedule(nx, ny)
+
+    def tick(self):
+        self.tick_count += 1
+        updates = 0
+        while self.queue and self.queue[0][0] <= self.tick_count and updates < self.max_updates_per_tick:
+            _, _, x, y = heapq.heappop(self.queue)
+            self.scheduled.discard((x, y))
+            self.update_cell(x, y)
+            updates += 1
+
+    def update_cell(self, x, y):
+        # The block may have changed since the update was scheduled
+        block_id = self.world.get_block_id(x, y)
+        if BLOCK_FALLS[block_id]:
+            self.fall(x, y, block_id)
+        elif BLOCK_DECAYS[block_id]:
+            self.decay(x, y)
+        elif BLOCK_FLUID_LEVEL[block_id] is not None:
+            self.flow(x, y, BLOCK_FLUID_LEVEL[block_id])
+
+    def fall(self, x, y, block_id):
+        world = self.world
+        # Moving it schedules the cell below, so it keeps falling until it lands
+        if world.get_block_id(x, y + 1) == AIR and world.set_block_id(x, y + 1, block_id):
+            world.set_block_id(x, y, AIR)
+
+    def decay(self, x, y):
+        world = self.world
+        for nx in range(x - self.leaf_range, x + self.leaf_range + 1):
+            for ny in range(y - self.leaf_range, y + self.leaf_range + 1):
+                if BLOCK_HOLDS_LEAVES[world.get_block_id(nx, ny)]:
+                    return
+        world.set_block_id(x, y, AIR)
+
+    def flow(self, x, y, level):
+        world = self.world
+        if level > 0:
+            # Flowing water needs water above it or beside it closer to the source
+            if BLOCK_FLUID_LEVEL[world.get_block_id(x, y - 1)] is not None:
+                new_level = 1
+            else:
+                sides = [BLOCK_FLUID_LEVEL[world.get_block_id(nx, y)] for nx in (x - 1, x + 1)]
+                sides = [side for side in sides if side is not None]
+                new_level = min(sides) + 1 if sides else None
+            if new_level is None or new_level > self.max_fluid_level:
+                world.set_block_id(x, y, AIR)
+                return
+            if new_level != level:
+                # Changing the level schedules this cell again to carry on from there
+                world.set_block_id(x, y, FLUID_IDS[new_level])
+                return
+
+        if world.get_block_id(x, y + 1) == AIR:
+            world.set_block_id(x, y + 1, FLUID_IDS[1])
+            return
+        if level < self.max_fluid_level:
+            for nx in (x - 1, x + 1):
+                side = world.get_block_id(nx, y)
+                side_level = BLOCK_FLUID_LEVEL[side]
+                if side == AIR or (side_level is not None and side_level > level + 1):
+                    world.set_block_id(nx, y, FLUID_IDS[level + 1])
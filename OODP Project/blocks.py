@@ -0,0 +1,88 @@
+# Every block type the world can hold. A chunk keeps one byte per cell, so
+# there can be at most 256 of them. Everything else about a block is read
+# from the per-id tables built below, so adding a block is one entry here.
+
+# Tools that can break blocks, as bits of BLOCK_TOOLS. HAND covers clicking
+# with anything else, like a block from the inventory.
+TOOLS = ['axe', 'pickaxe', 'shovel']
+TOOL_BITS = {tool: 1 << i for i, tool in enumerate(TOOLS)}
+HAND = 1 << len(TOOLS)
+ANY_TOOL = TOOL_BITS['axe'] | TOOL_BITS['pickaxe'] | TOOL_BITS['shovel']
+
+
+class BlockType:
+    def __init__(self, name, texture, icon=None, solid=True, tools=0, drops=True, light=0, opacity=None,
+                 replaceable=False, falls=False, decays=False, holds_leaves=False, fluid_level=None):
+        self.name = name
+        # texture is drawn in the world, icon in the inventory
+        self.texture = texture
+        self.icon = icon if icon is not None else texture
+        self.solid = solid
+        self.tools = tools
+        self.drops = drops
+        self.light = light
+        # Light levels lost leaving a cell of this block
+        self.opacity = opacity if opacity is not None else (3 if solid else 1)
+        # Blocks can be placed straight over replaceable ones
+        self.replaceable = replaceable
+        # Block update behaviour, see block_updates.py
+        self.falls = falls
+        self.decays = decays
+        self.holds_leaves = holds_leaves
+        self.fluid_level = fluid_level
+
+
+BLOCK_TYPES = [
+    BlockType('air', None, solid=False, drops=False, replaceable=True),
+    BlockType('grass', 'assets/blocks/grass.png', tools=TOOL_BITS['shovel']),
+    BlockType('dirt', 'assets/blocks/dirt.png', tools=TOOL_BITS['shovel']),
+    BlockType('cobblestone', 'assets/blocks/cobblestone.png', tools=TOOL_BITS['pickaxe']),
+    BlockType('gem', 'assets/blocks/diamond_ore.png', icon='assets/blocks/diamond.png', tools=TOOL_BITS['pickaxe'], light=8),
+    BlockType('granite', 'assets/blocks/granite.png', tools=TOOL_BITS['pickaxe']),
+    BlockType('andesite', 'assets/blocks/andesite.png', tools=TOOL_BITS['pickaxe']),
+    BlockType('wood', 'assets/blocks/wood.png', tools=TOOL_BITS['axe'], holds_leaves=True),
+    # Leaves come away with anything and leave nothing behind
+    BlockType('leaves', 'assets/blocks/leaves.png', tools=ANY_TOOL | HAND, drops=False, opacity=2, decays=True),
+    BlockType('flower1', 'assets/blocks/flower1.png', solid=False, tools=ANY_TOOL, falls=True),
+    BlockType('flower2', 'assets/blocks/flower2.png', solid=False, tools=ANY_TOOL, falls=True),
+    BlockType('bomb', 'assets/blocks/shrooms.png', solid=False, light=10, falls=True),
+    # A water source and the water flowing out of it, one step further away each
+    BlockType('water', 'assets/blocks/water.png', solid=False, drops=False, opacity=2, replaceable=True, fluid_level=0),
+    BlockType('water_1', 'assets/blocks/water.png', solid=False, drops=False, opacity=2, replaceable=True, fluid_level=1),
+    BlockType('water_2', 'assets/blocks/water.png', solid=False, drops=False, opacity=2, replaceable=True, fluid_level=2),
+    BlockType('water_3', 'assets/blocks/water.png', solid=False, drops=False, opacity=2, replaceable=True, fluid_level=3),
+]
+
+BLOCK_NAMES = [block.name for block in BLOCK_TYPES]
+BLOCK_IDS = {name: i for i, name in enumerate(BLOCK_NAMES)}
+AIR = BLOCK_IDS['air']
+
+BLOCK_TEXTURES = [block.texture for block in BLOCK_TYPES]
+BLOCK_ICONS = [block.icon for block in BLOCK_TYPES]
+BLOCK_SOLID = [block.solid for block in BLOCK_TYPES]
+BLOCK_TOOLS = [block.tools for block in BLOCK_TYPES]
+# The block id that goes to the inventory when a block is broken, or None
+BLOCK_DROP = [i if block.drops else None for i, block in enumerate(BLOCK_TYPES)]
+# Light each block gives off, from 0 to 15
+BLOCK_LIGHT = [block.light for block in BLOCK_TYPES]
+BLOCK_OPACITY = [block.opacity for block in BLOCK_TYPES]
+BLOCK_REPLACEABLE = [block.replaceable for block in BLOCK_TYPES]
+BLOCK_FALLS = [block.falls for block in BLOCK_TYPES]
+BLOCK_DECAYS = [block.decays for block in BLOCK_TYPES]
+BLOCK_HOLDS_LEAVES = [block.holds_leaves for block in BLOCK_TYPES]
+# How far a fluid block is from its source, or None for everything else
+BLOCK_FLUID_LEVEL = [block.fluid_level for block in BLOCK_TYPES]
+# The fluid block id for each level
+FLUID_IDS = [i for level, i in sorted((level, i) for i, level in enumerate(BLOCK_FLUID_LEVEL) if level is not None)]
+
+
+def get_tool_bit(item):
+    return TOOL_BITS.get(item, HAND)
+
+
+def get_dig_tool(block_id):
+    # The first tool that can break the block, None if no tool can
+    for tool in TOOLS:
+        if BLOCK_TOOLS[block_id] & TOOL_BITS[tool]:
+            return tool
+    return None
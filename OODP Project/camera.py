@@ -5,6 +5,9 @@ class Camera:
         self.height = height
         self.offset = pygame.math.Vector2()
 
-    def update(self, player):
-        self.offset.x = player.rect.centerx - self.width // 2
-        self.offset.y = player.rect.centery - self.height // 2
\ No newline at end of file
+    def update(self, player, alpha=1.0):
+        # Follows the player's interpolated position, alpha is how far the
+        # frame is between the last two simulation ticks
+        render_pos = player.get_render_pos(alpha)
+        self.offset.x = round(render_pos.x + player.rect.width // 2 - self.width // 2)
+        self.offset.y = round(render_pos.y + player.rect.height // 2 - self.height // 2)
\ No newline at end of file
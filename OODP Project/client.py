@@ -0,0 +1,203 @@
+"""Plays on a server started with server.py.
+
+    python client.py
+    python client.py --host 127.0.0.1 --port 25570
+    python client.py --bot --seconds 30
+
+--bot runs without a window, walking and digging on its own, and prints how
+much it received, so several clients can be tried on one machine.
+"""
+import argparse
+import os
+import select
+import socket
+import sys
+import time
+import zlib
+
+import pygame
+from blocks import AIR, get_dig_tool
+from input_trace import TraceKeys, get_key_mask
+from inventory import HOTBAR_KEYS
+from main import Game
+from net import (Connection, WELCOME, CHUNK, UNLOAD, TICK, INPUT, CLICK, WELCOME_DATA, CHUNK_HEADER, UNLOAD_DATA,
+                 INPUT_DATA, CLICK_DATA, decode_tick)
+from player import Player
+from world import World
+
+
+class RemoteGame(Game):
+    """A game whose world and players live on a server.
+
+    Input goes to the server and the world it sends back is drawn with the
+    usual renderer, through a remote World that only holds what it's sent.
+    """
+
+    def __init__(self, host, port, render_mode='capped', terrain_render='scroll'):
+        connection = Connection(socket.create_connection((host, port)))
+        welcome, self.backlog = self.wait_for_welcome(connection)
+        self.player_id, seed, terrain, render_distance = WELCOME_DATA.unpack(welcome)
+        world = World(seed=seed, terrain=terrain.rstrip(b'\0').decode(), render_distance=render_distance,
+                      workers=0, remote=True)
+        super().__init__(world, render_mode=render_mode, terrain_render=terrain_render)
+        self.connection = connection
+        self.sent_mask = None
+        self.entity_states = {}
+        self.last_tick = 0
+
+    def wait_for_welcome(self, connection):
+        """Returns the WELCOME payload and whatever arrived after it in the same read."""
+        while True:
+            select.select([connection.sock], [], [], 1)
+            messages = connection.receive()
+            for i, (kind, payload) in enumerate(messages):
+                if kind == WELCOME:
+                    return payload, messages[i + 1:]
+            if connection.closed:
+                raise ConnectionError("the server closed the connection")
+
+    def click(self, button, pos):
+        self.connection.send(CLICK, CLICK_DATA.pack(button, int(pos[0] + self.camera.offset.x),
+                                                    int(pos[1] + self.camera.offset.y)))
+
+    def update(self, keys=None):
+        if keys is None:
+            keys = pygame.key.get_pressed()
+        mask = get_key_mask(keys)
+        if mask != self.sent_mask:
+            self.connection.send(INPUT, INPUT_DATA.pack(mask))
+            self.sent_mask = mask
+        self.connection.flush()
+
+        # Anything not moved this tick is drawn where it is
+        for player in [self.player] + list(self.other_players.values()):
+            player.previous_pos.update(player.rect.topleft)
+        messages = self.backlog + self.connection.receive()
+        self.backlog = []
+        for kind, payload in messages:
+            self.apply(kind, payload)
+        if self.world.entities is not None and self.entity_states:
+            self.set_entities()
+        if self.connection.closed:
+            return False
+
+        self.show_lost_life()
+        return True
+
+    def apply(self, kind, payload):
+        world = self.world
+        if kind == CHUNK:
+            chunk_x, = CHUNK_HEADER.unpack_from(payload)
+            if chunk_x in world.chunks:
+                world.unload_chunk(chunk_x)
+            world.install_chunk(chunk_x, bytearray(zlib.decompress(payload[CHUNK_HEADER.size:])), False)
+        elif kind == UNLOAD:
+            chunk_x, = UNLOAD_DATA.unpack(payload)
+            if chunk_x in world.chunks:
+                world.unload_chunk(chunk_x)
+        elif kind == TICK:
+            self.last_tick, sections, player_state = decode_tick(payload)
+            cells, players, removed_players, entities, removed_entities = sections
+            for tile_x, tile_y, block_id in cells:
+                world.set_block_id(tile_x, tile_y, block_id)
+            for player_id, x, y in players:
+                if player_id == self.player_id:
+                    self.player.rect.topleft = (x, y)
+                else:
+                    player = self.other_players.get(player_id)
+                    if player is None:
+                        player = self.other_players[player_id] = Player(x, y)
+                    player.rect.topleft = (x, y)
+            for player_id, in removed_players:
+                self.other_players.pop(player_id, None)
+            for entity_id, entity_kind, item, x, y in entities:
+                self.entity_states[entity_id] = (entity_kind, item, x, y)
+            for entity_id, in removed_entities:
+                self.entity_states.pop(entity_id, None)
+            if player_state is not None:
+                lives, stamina, selected, slots = player_state
+                self.player.lives = lives
+                self.player.stamina = stamina
+                self.player.inventory.select(selected)
+                for slot, (block_id, count) in enumerate(slots):
+                    self.player.inventory.set_block_slot(slot, block_id, count)
+
+    def set_entities(self):
+        ids = list(self.entity_states)
+        states = list(self.entity_states.values())
+        self.world.entities.set_state(ids, [state[0] for state in states], [state[1] for state in states],
+                                      [state[2] for state in states], [state[3] for state in states])
+
+    def run(self):
+        super().run()
+        self.connection.close()
+
+    def run_bot(self, seconds, direction):
+        """Plays without rendering: walks one way, hopping steps and digging out of dead ends."""
+        start = time.perf_counter()
+        next_tick = start
+        tick = 0
+        targets = []
+        while time.perf_counter() - start < seconds:
+            now = time.perf_counter()
+            if now < next_tick:
+                time.sleep(next_tick - now)
+            next_tick += self.tick_time
+            keys = TraceKeys(0)
+            keys.pressed.update([pygame.K_d if direction > 0 else pygame.K_a, pygame.K_SPACE])
+            # Select the right tool one tick, click with it the next
+            for _, tile_pos in targets:
+                x = tile_pos[0] * self.world.tile_size + self.world.tile_size // 2
+                y = tile_pos[1] * self.world.tile_size + self.world.tile_size // 2
+                self.connection.send(CLICK, CLICK_DATA.pack(1, x, y))
+            targets = []
+            if tick % 30 == 0:
+                tile_x, tile_y = self.player.get_pos()
+                for tile_pos in [(tile_x + direction, tile_y), (tile_x + direction, tile_y - 1)]:
+                    block_id = self.world.get_block_id(*tile_pos)
+                    if block_id != AIR:
+                        targets.append((get_dig_tool(block_id), tile_pos))
+                if targets:
+                    # One tool per click round, anything needing another waits for the next
+                    tool = targets[0][0]
+                    targets = [target for target in targets if target[0] == tool]
+                    if tool is not None:
+                        keys.pressed.add(HOTBAR_KEYS[self.player.inventory.tools.index(tool)][0])
+            if not self.update(keys):
+                break
+            tick += 1
+        elapsed = time.perf_counter() - start
+        self.connection.close()
+        return tick, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Block Survival client")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=25570)
+    parser.add_argument('--render-mode', choices=['capped', 'uncapped', 'vsync'], default='capped')
+    parser.add_argument('--terrain-render', choices=['scroll', 'full'], default='scroll')
+    parser.add_argument('--bot', action='store_true', help="play headless on a script instead of the keyboard")
+    parser.add_argument('--seconds', type=float, default=30, help="how long a bot plays")
+    parser.add_argument('--direction', type=int, choices=[-1, 1], default=1, help="which way a bot walks")
+    args = parser.parse_args()
+    if args.bot:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+    # Assets are loaded relative to the game directory
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    game = RemoteGame(args.host, args.port, render_mode=args.render_mode, terrain_render=args.terrain_render)
+    if args.bot:
+        ticks, elapsed = game.run_bot(args.seconds, args.direction)
+        received = game.connection.bytes_received
+        print(f"player {game.player_id} played {ticks} ticks, received {received / 1024:.1f} KB, "
+              f"{received / 1024 / elapsed:.1f} KB/s, ended at {game.player.get_pos()}")
+    else:
+        game.run()
+    pygame.quit()
+    sys.exit()
+
+
+if __name__ == "__main__":
+    main()
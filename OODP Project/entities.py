@@ -0,0 +1,278 @@
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from asset_manager import asset_manager
+from blocks import BLOCK_ICONS, BLOCK_SOLID
+
+ITEM = 0
+MOB = 1
+
+
+class Entities:
+    """Dropped items and mobs, stepped together as arrays.
+
+    Every entity is one index into a set of NumPy arrays (position,
+    velocity, kind, ...) and a tick moves all of them with a handful of
+    array operations. Collisions look up a grid of which world cells are
+    solid, built from the loaded chunks and rebuilt only when a chunk
+    changes, so no entity ever touches a Python Tile or Sprite.
+    """
+
+    def __init__(self, world):
+        self.world = world
+        self.tile_size = world.tile_size
+        self.count = 0
+        self.capacity = 0
+        # Ids stay with an entity while the arrays are compacted, for network sync
+        self.next_id = 1
+        self.arrays = {}
+        self.grow(256)
+        self.random = np.random.default_rng(world.seed)
+
+        # Entity sizes in pixels, indexed by kind
+        self.widths = np.array([16, 26])
+        self.heights = np.array([16, 26])
+
+        # Physics attributes, per tick
+        self.gravity = 0.5
+        self.max_fall_speed = 12
+        self.item_friction = 0.8
+        self.mob_speed = 1.5
+        self.mob_jump_strength = -7
+
+        # Item attributes
+        self.pickup_delay = 30
+        self.pickup_range = 64
+        self.item_lifetime = 60 * 60 * 5
+
+        # Mob attributes
+        self.max_mobs = 8
+        self.mob_spawn_chance = 0.01
+        self.mob_turn_chance = 0.005
+
+        # Solid cell grid over the loaded chunks
+        self.solid_table = np.array(BLOCK_SOLID + [True] * (256 - len(BLOCK_SOLID)))
+        self.chunk_solids = {}
+        self.grid = None
+        self.grid_x = 0
+
+        self.sprites = None
+
+    def grow(self, capacity):
+        fields = {
+            'x': np.float64, 'y': np.float64, 'vx': np.float64, 'vy': np.float64,
+            'previous_x': np.float64, 'previous_y': np.float64,
+            'kind': np.uint8, 'item': np.uint8, 'age': np.int32, 'direction': np.int8, 'id': np.uint32,
+        }
+        for name, dtype in fields.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if name in self.arrays:
+                array[:self.count] = self.arrays[name][:self.count]
+            self.arrays[name] = array
+        self.capacity = capacity
+
+    def spawn(self, kind, x, y, vx=0, vy=0, item=0):
+        if self.count == self.capacity:
+            self.grow(self.capacity * 2)
+        i = self.count
+        values = {'x': x, 'y': y, 'vx': vx, 'vy': vy, 'previous_x': x, 'previous_y': y,
+                  'kind': kind, 'item': item, 'age': 0, 'direction': self.random.choice([-1, 1]), 'id': self.next_id}
+        for name, value in values.items():
+            self.arrays[name][i] = value
+        self.count += 1
+        self.next_id += 1
+
+    def spawn_item(self, block_id, tile_x, tile_y):
+        # Items pop out of the middle of the broken cell
+        x = tile_x * self.tile_size + (self.tile_size - self.widths[ITEM]) / 2
+        y = tile_y * self.tile_size + (self.tile_size - self.heights[ITEM]) / 2
+        self.spawn(ITEM, x, y, vx=self.random.uniform(-1.5, 1.5), vy=-3, item=block_id)
+
+    def update_grid(self):
+        world = self.world
+        changed = self.grid is None or self.chunk_solids.keys() != world.chunks.keys()
+        for chunk_x in list(self.chunk_solids):
+            if chunk_x not in world.chunks:
+                del self.chunk_solids[chunk_x]
+        for chunk_x, chunk in world.chunks.items():
+            cached = self.chunk_solids.get(chunk_x)
+            if cached is None or cached[0] != chunk.version:
+                blocks = np.frombuffer(chunk.blocks, dtype=np.uint8).reshape(world.chunk_width, world.world_height)
+                self.chunk_solids[chunk_x] = (chunk.version, self.solid_table[blocks])
+                changed = True
+        if not changed:
+            return
+
+        # Chunks that aren't loaded count as solid, so nothing falls out of the
+        # world. A border round the grid, open above and solid elsewhere, lets
+        # lookups clamp their indices instead of masking.
+        first, last = min(self.chunk_solids), max(self.chunk_solids)
+        self.grid = np.ones(((last - first + 1) * world.chunk_width + 2, world.world_height + 2), dtype=bool)
+        self.grid[:, 0] = False
+        for chunk_x, (_, solid) in self.chunk_solids.items():
+            start = (chunk_x - first) * world.chunk_width + 1
+            self.grid[start:start + world.chunk_width, 1:-1] = solid
+        self.grid_x = first * world.chunk_width - 1
+
+    def is_solid(self, pixel_x, pixel_y):
+        """Looks up arrays of pixel positions in the solid grid."""
+        width, height = self.grid.shape
+        columns = np.floor(pixel_x / self.tile_size).astype(np.int64) - self.grid_x
+        rows = np.floor(pixel_y / self.tile_size).astype(np.int64) + (self.world.world_height // 2 + 1)
+        np.clip(columns, 0, width - 1, out=columns)
+        np.clip(rows, 0, height - 1, out=rows)
+        return np.take(self.grid.ravel(), columns * height + rows)
+
+    def update(self, players):
+        self.spawn_mobs(players)
+        if self.count == 0:
+            return
+        self.update_grid()
+
+        n = self.count
+        a = {name: array[:n] for name, array in self.arrays.items()}
+        a['previous_x'][:] = a['x']
+        a['previous_y'][:] = a['y']
+        a['age'] += 1
+        widths = self.widths[a['kind']]
+        heights = self.heights[a['kind']]
+        mobs = a['kind'] == MOB
+
+        # Mobs wander, turning round now and then
+        turn = mobs & (self.random.random(n) < self.mob_turn_chance)
+        a['direction'][turn] *= -1
+        a['vx'][mobs] = a['direction'][mobs] * self.mob_speed
+        a['vy'][:] = np.minimum(a['vy'] + self.gravity, self.max_fall_speed)
+
+        # Horizontal movement, stopped by the cells at the leading edge
+        x = a['x'] + a['vx']
+        lead = np.where(a['vx'] > 0, x + widths - 1, x)
+        blocked = (a['vx'] != 0) & (self.is_solid(lead, a['y']) | self.is_solid(lead, a['y'] + heights - 1))
+        edge = np.floor(lead / self.tile_size) * self.tile_size
+        x = np.where(blocked, np.where(a['vx'] > 0, edge - widths, edge + self.tile_size), x)
+        a['x'][:] = x
+        a['vx'][blocked] = 0
+
+        # Vertical movement, the same against the cells above or below
+        y = a['y'] + a['vy']
+        lead = np.where(a['vy'] > 0, y + heights - 1, y)
+        hit = (a['vy'] != 0) & (self.is_solid(a['x'], lead) | self.is_solid(a['x'] + widths - 1, lead))
+        edge = np.floor(lead / self.tile_size) * self.tile_size
+        y = np.where(hit, np.where(a['vy'] > 0, edge - heights, edge + self.tile_size), y)
+        on_ground = hit & (a['vy'] > 0)
+        # A mob still blocked on the way down from a hop has met a wall it can't climb
+        a['direction'][mobs & blocked & (a['vy'] > 0) & ~on_ground] *= -1
+        a['y'][:] = y
+        a['vy'][hit] = 0
+
+        # Items slide to a stop, mobs hop at whatever they walked into
+        a['vx'][on_ground & ~mobs] *= self.item_friction
+        a['vy'][mobs & blocked & on_ground] = self.mob_jump_strength
+
+        self.collect_items(players, a, widths, heights)
+
+    def collect_items(self, players, a, widths, heights):
+        remove = (a['kind'] == ITEM) & (a['age'] > self.item_lifetime)
+        # Mobs far from every player are dropped, the spawner makes new ones near them
+        despawn_range = (self.world.unload_radius * self.world.chunk_width) * self.tile_size
+        far = a['kind'] == MOB
+        for player in players:
+            player_x, player_y = player.rect.center
+            far &= np.abs(a['x'] - player_x) > despawn_range
+            distance_x = a['x'] + widths / 2 - player_x
+            distance_y = a['y'] + heights / 2 - player_y
+            near = ((a['kind'] == ITEM) & (a['age'] > self.pickup_delay) & ~remove
+                    & (distance_x * distance_x + distance_y * distance_y < self.pickup_range ** 2))
+            for i in np.flatnonzero(near):
+                # Items stay on the ground while the inventory is full
+                if player.inventory.add(int(a['item'][i])):
+                    remove[i] = True
+        remove |= far
+        if remove.any():
+            self.remove(~remove)
+
+    def remove(self, keep):
+        kept = int(keep.sum())
+        for array in self.arrays.values():
+            array[:kept] = array[:self.count][keep]
+        self.count = kept
+
+    def spawn_mobs(self, players):
+        if self.random.random() >= self.mob_spawn_chance or not self.world.chunks:
+            return
+        if self.count and np.count_nonzero(self.arrays['kind'][:self.count] == MOB) >= self.max_mobs * len(players):
+            return
+        self.update_grid()
+
+        # Somewhere loaded but off a player's screen, standing on the surface
+        world = self.world
+        player_x = players[int(self.random.integers(len(players)))].get_pos()[0]
+        offset = int(self.random.integers(15, world.load_radius * world.chunk_width + 1))
+        tile_x = player_x + int(self.random.choice([-1, 1])) * offset
+        if world.get_chunk_x(tile_x) not in world.chunks:
+            return
+        surface_row = int(np.argmax(self.grid[tile_x - self.grid_x, 1:-1]))
+        if surface_row < 2:
+            return
+        tile_y = surface_row - world.world_height // 2 - 1
+        self.spawn(MOB, tile_x * self.tile_size + 3, tile_y * self.tile_size + 32 - self.heights[MOB])
+
+    def set_state(self, ids, kinds, items, xs, ys):
+        """Replaces every entity with ones sent by a server, to be drawn but not simulated."""
+        n = len(ids)
+        previous = dict(zip(self.arrays['id'][:self.count].tolist(),
+                            zip(self.arrays['x'][:self.count].tolist(), self.arrays['y'][:self.count].tolist())))
+        while self.capacity < n:
+            self.grow(self.capacity * 2)
+        a = self.arrays
+        a['id'][:n] = ids
+        a['kind'][:n] = kinds
+        a['item'][:n] = items
+        a['x'][:n] = xs
+        a['y'][:n] = ys
+        # Entities that were here before move on from where they were drawn
+        for i, entity_id in enumerate(ids):
+            a['previous_x'][i], a['previous_y'][i] = previous.get(entity_id, (xs[i], ys[i]))
+        self.count = n
+
+    def load_sprites(self):
+        self.sprites = {}
+        for block_id, path in enumerate(BLOCK_ICONS):
+            if path is not None:
+                self.sprites[(ITEM, block_id)] = asset_manager.scaled(path, (self.widths[ITEM], self.heights[ITEM]))
+        # Mobs are a tinted copy of the player until they get art of their own
+        mob = asset_manager.scaled('assets/player.png', (self.widths[MOB], self.heights[MOB])).copy()
+        mob.fill((120, 230, 120), special_flags=pygame.BLEND_RGB_MULT)
+        self.sprites[(MOB, 0)] = mob
+
+    def render(self, screen, camera, alpha=1.0):
+        if self.count == 0:
+            return
+        if self.sprites is None:
+            self.load_sprites()
+
+        n = self.count
+        a = {name: array[:n] for name, array in self.arrays.items()}
+        screen_x = np.rint(a['previous_x'] + (a['x'] - a['previous_x']) * alpha - camera.offset.x).astype(np.int64)
+        screen_y = np.rint(a['previous_y'] + (a['y'] - a['previous_y']) * alpha - camera.offset.y).astype(np.int64)
+        width, height = screen.get_size()
+        visible = np.flatnonzero((screen_x > -32) & (screen_x < width) & (screen_y > -32) & (screen_y < height))
+        if len(visible) == 0:
+            return
+
+        sprites = self.sprites
+        kinds = a['kind'][visible].tolist()
+        items = np.where(a['kind'][visible] == ITEM, a['item'][visible], 0).tolist()
+        positions = zip(screen_x[visible].tolist(), screen_y[visible].tolist())
+        screen.blits([(sprites[key], position) for key, position in zip(zip(kinds, items), positions)], doreturn=False)
+
+
+def make_entities(world):
+    # Entities are stepped with NumPy, without it broken blocks go straight to the inventory
+    if np is None:
+        return None
+    return Entities(world)
@@ -0,0 +1,115 @@
+"""Exports a saved world to a PNG with one pixel per block.
+
+    python export_map.py saves/world map.png
+    python export_map.py saves/world map.png --chunks -20 20
+
+Chunks are taken one at a time, from the save or generated from its seed
+if they were never saved, and written into a buffer on disk. The PNG is
+then compressed from that buffer a row at a time, so the whole map is
+never held in memory, however wide the world is.
+"""
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import struct
+import tempfile
+import zlib
+
+import pygame
+from minimap import get_block_colors
+from world_save import WorldSave
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def write_png_chunk(file, kind, data):
+    file.write(struct.pack('>I', len(data)))
+    file.write(kind)
+    file.write(data)
+    file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+
+def write_png(path, width, height, palette, rows):
+    """Writes an 8-bit palette PNG, compressing rows as they come."""
+    with open(path, 'wb') as file:
+        file.write(PNG_SIGNATURE)
+        # bit depth 8, color type 3 (palette), default compression, filter and interlace
+        write_png_chunk(file, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 3, 0, 0, 0))
+        write_png_chunk(file, b'PLTE', b''.join(bytes(color) for color in palette))
+        compressor = zlib.compressobj()
+        for row in rows:
+            # Each row starts with its filter type, 0 for none
+            data = compressor.compress(b'\0' + row)
+            if data:
+                write_png_chunk(file, b'IDAT', data)
+        write_png_chunk(file, b'IDAT', compressor.flush())
+        write_png_chunk(file, b'IEND', b'')
+
+
+def get_chunk_blocks(world, chunk_x):
+    chunk = world.chunks.get(chunk_x)
+    if chunk is not None:
+        return chunk.blocks
+    blocks = world.read_chunk(chunk_x)
+    if blocks is None:
+        blocks = world.generator.generate_chunk(chunk_x)
+    return blocks
+
+
+def export_map(world, path, first_chunk, last_chunk):
+    chunk_width, height = world.chunk_width, world.world_height
+    width = (last_chunk - first_chunk + 1) * chunk_width
+
+    with tempfile.TemporaryFile() as buffer:
+        # Chunks are stored a column at a time, the PNG wants rows
+        for i, chunk_x in enumerate(range(first_chunk, last_chunk + 1)):
+            blocks = get_chunk_blocks(world, chunk_x)
+            for row in range(height):
+                buffer.seek(row * width + i * chunk_width)
+                buffer.write(blocks[row::height])
+
+        def rows():
+            buffer.seek(0)
+            for _ in range(height):
+                yield buffer.read(width)
+
+        write_png(path, width, height, get_block_colors(), rows())
+    return width, height
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a saved world to a PNG map")
+    parser.add_argument('save', help="world save directory, like saves/world")
+    parser.add_argument('output', help="PNG file to write")
+    parser.add_argument('--chunks', nargs=2, type=int, metavar=('FIRST', 'LAST'),
+                        help="chunk range to export, every saved chunk by default")
+    args = parser.parse_args()
+    save_path = os.path.abspath(args.save)
+    output_path = os.path.abspath(args.output)
+
+    # Assets are loaded relative to the game directory
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    pygame.init()
+
+    save = WorldSave(save_path)
+    if not save.exists():
+        parser.error(f"no world save at {args.save}")
+    world = save.load_world(workers=0)
+    if args.chunks is not None:
+        first_chunk, last_chunk = args.chunks
+    else:
+        saved = list(save.slots) or [0]
+        first_chunk, last_chunk = min(saved), max(saved)
+
+    width, height = export_map(world, output_path, first_chunk, last_chunk)
+    world.close()
+    save.close()
+    print(f"wrote {args.output}, {width}x{height} pixels from chunks {first_chunk} to {last_chunk}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import pygame
+from asset_manager import asset_manager
+
+
+class HUD:
+    """Draws the player's health, stamina and inventory bar.
+
+    Both panels are composed into cached surfaces that are only redrawn when
+    the player values they show change, so a normal frame is two blits.
+    """
+
+    def __init__(self):
+        self.font = None
+        self.count_texts = {}
+
+        self.status_panel = None
+        self.status_key = None
+        self.stamina_bar_width = 200
+
+        self.inventory_panel = None
+        self.inventory_key = None
+        self.inventory_bar_width = 450
+        self.inventory_bar_height = 50
+
+    def render(self, screen, player):
+        # Stamina only changes what is drawn when the bar gains or loses a pixel
+        status_key = (player.lives, int(self.stamina_bar_width * player.stamina / player.max_stamina))
+        if status_key != self.status_key:
+            self.status_panel = self.draw_status(player)
+            self.status_key = status_key
+        screen.blit(self.status_panel, (0, 0))
+
+        inventory_key = (player.inventory.version, player.inventory.selected)
+        if inventory_key != self.inventory_key:
+            self.inventory_panel = self.draw_inventory(player)
+            self.inventory_key = inventory_key
+        screen_width, screen_height = screen.get_size()
+        inventory_x = (screen_width - self.inventory_bar_width) // 2
+        inventory_y = screen_height - self.inventory_bar_height - 20
+        screen.blit(self.inventory_panel, (inventory_x, inventory_y))
+
+    def draw_status(self, player):
+        panel = pygame.Surface((self.stamina_bar_width + 20, 50), pygame.SRCALPHA)
+
+        health_image = asset_manager.scaled('assets/gui/lifeline.png', (15, 15))
+        health_x1, health_y1 = 75, 10
+        for i in range(player.lives):
+            panel.blit(health_image, (health_x1 - (i * 16), health_y1))
+
+        stamina_bar_height = 10
+        stamina_percentage = player.stamina / player.max_stamina
+        current_stamina_bar_width = self.stamina_bar_width * stamina_percentage
+        bar_x, bar_y = 10, 35
+        pygame.draw.rect(panel, (60, 60, 60), (bar_x, bar_y, self.stamina_bar_width, stamina_bar_height))
+        pygame.draw.rect(panel, (255, 255, 255), (bar_x, bar_y, current_stamina_bar_width, stamina_bar_height))
+        pygame.draw.rect(panel, (0, 0, 0), (bar_x, bar_y, self.stamina_bar_width, stamina_bar_height), 2)
+        return panel
+
+    def draw_inventory(self, player):
+        inventory = player.inventory
+        bar_width, bar_height = self.inventory_bar_width, self.inventory_bar_height
+        slot_width = bar_width // inventory.size
+        # Leave room for block counts that run past the last slot
+        panel = pygame.Surface((bar_width + 30, bar_height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 150), (0, 0, bar_width, bar_height))
+
+        for slot in range(inventory.size):
+            slot_x = slot * slot_width
+            box_color = (200, 200, 200) if slot == inventory.selected else (0, 0, 0)
+            pygame.draw.rect(panel, box_color, (slot_x, 0, slot_width, bar_height), 2)
+
+            item = inventory.get_item(slot)
+            if item is None:
+                continue
+            item_texture = player.textures.get(item)
+            if item_texture:
+                panel.blit(item_texture, (slot_x + (slot_width - slot_width // 2) // 2, (bar_height - 5 - bar_height // 2) // 2))
+
+            if slot >= len(inventory.tools):
+                count_text = self.get_count_text(inventory.counts[slot - len(inventory.tools)])
+                panel.blit(count_text, (slot_x + slot_width - 10, bar_height - 20))
+        return panel
+
+    def get_count_text(self, count):
+        count_text = self.count_texts.get(count)
+        if count_text is None:
+            if self.font is None:
+                self.font = pygame.font.Font(None, 24)
+            count_text = self.font.render(str(count), True, (255, 255, 255))
+            self.count_texts[count] = count_text
+        return count_text
@@ -0,0 +1,111 @@
+import hashlib
+import struct
+
+import pygame
+from inventory import HOTBAR_KEYS
+
+MAGIC = b'BSTR'
+VERSION = 1
+# magic, version, seed, terrain generator, render distance
+HEADER = struct.Struct('<4sHQ16sH')
+RECORD_TYPE = struct.Struct('<B')
+# Held keys as a bit mask over TRACE_KEYS
+TICK = struct.Struct('<H')
+# Mouse button and the click position in world pixels
+CLICK = struct.Struct('<Bii')
+# Digest of the game state the recording ended on
+END = struct.Struct('<32s')
+TICK_RECORD, CLICK_RECORD, END_RECORD = 0, 1, 2
+
+# Every key Player.update reads
+TRACE_KEYS = [pygame.K_a, pygame.K_d, pygame.K_LSHIFT, pygame.K_SPACE] + [key for key, _ in HOTBAR_KEYS]
+
+
+def get_key_mask(keys):
+    mask = 0
+    for i, key in enumerate(TRACE_KEYS):
+        if keys[key]:
+            mask |= 1 << i
+    return mask
+
+
+def get_state_digest(game):
+    """Hashes everything a replay has to reproduce: player, blocks and entities."""
+    world, player = game.world, game.player
+    digest = hashlib.sha256()
+    digest.update(struct.pack('<iiBf', player.rect.x, player.rect.y, max(player.lives, 0), player.stamina))
+    digest.update(repr((player.inventory.get_block_slots(), player.inventory.selected)).encode())
+    for chunk_x in sorted(world.chunks):
+        digest.update(struct.pack('<i', chunk_x))
+        digest.update(world.chunks[chunk_x].blocks)
+    for chunk_x in sorted(world.stored_chunks):
+        digest.update(struct.pack('<i', chunk_x))
+        digest.update(world.stored_chunks[chunk_x])
+    if world.entities is not None:
+        for array in world.entities.arrays.values():
+            digest.update(array[:world.entities.count].tobytes())
+    return digest.digest()
+
+
+class TraceKeys:
+    """Stands in for pygame.key.get_pressed() with the keys held in a trace tick."""
+
+    def __init__(self, mask):
+        self.pressed = {key for i, key in enumerate(TRACE_KEYS) if mask & (1 << i)}
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class TraceRecorder:
+    """Writes the input of a session to a trace file as it is played.
+
+    The file starts with the world settings, then has one small record per
+    simulation tick (the keys held) and per mouse click, in the order they
+    happened, and ends with a digest of the state the session ended on.
+    """
+
+    def __init__(self, path, world):
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, world.seed, world.generator.name.encode(), world.render_distance))
+
+    def record_tick(self, keys):
+        self.file.write(RECORD_TYPE.pack(TICK_RECORD) + TICK.pack(get_key_mask(keys)))
+
+    def record_click(self, button, world_x, world_y):
+        self.file.write(RECORD_TYPE.pack(CLICK_RECORD) + CLICK.pack(button, world_x, world_y))
+
+    def close(self, game):
+        self.file.write(RECORD_TYPE.pack(END_RECORD) + END.pack(get_state_digest(game)))
+        self.file.close()
+
+
+class TraceReader:
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.data = file.read()
+        magic, version, self.seed, terrain, self.render_distance = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} input trace")
+        self.terrain = terrain.rstrip(b'\0').decode()
+        self.digest = None
+
+    def records(self):
+        """Yields ('tick', TraceKeys) and ('click', button, x, y) in recorded order."""
+        offset = HEADER.size
+        while offset < len(self.data):
+            record_type, = RECORD_TYPE.unpack_from(self.data, offset)
+            offset += RECORD_TYPE.size
+            if record_type == TICK_RECORD:
+                mask, = TICK.unpack_from(self.data, offset)
+                offset += TICK.size
+                yield ('tick', TraceKeys(mask))
+            elif record_type == CLICK_RECORD:
+                button, x, y = CLICK.unpack_from(self.data, offset)
+                offset += CLICK.size
+                yield ('click', button, x, y)
+            elif record_type == END_RECORD:
+                self.digest, = END.unpack_from(self.data, offset)
+                offset += END.size
+            else:
+                raise ValueError(f"unknown record type {record_type} at byte {offset - RECORD_TYPE.size}")
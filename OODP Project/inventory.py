@@ -0,0 +1,97 @@
+import pygame
+from blocks import BLOCK_NAMES
+
+# Number keys pick hotbar slots, 1 the first and 0 the tenth
+HOTBAR_KEYS = [(getattr(pygame, f'K_{(slot + 1) % 10}'), slot) for slot in range(10)]
+
+
+class Inventory:
+    """The player's hotbar: tool slots followed by fixed block slots.
+
+    Block slots hold a block id and a count. A block that runs out leaves
+    its slot empty and a new block goes into the first empty slot, so the
+    other slots never move and a slot index always means the same slot.
+    """
+
+    def __init__(self, tools, block_slots):
+        self.tools = tools
+        self.size = len(tools) + block_slots
+        self.block_ids = [0] * block_slots
+        # A count of 0 is an empty slot
+        self.counts = [0] * block_slots
+        # Which block slot holds each block id
+        self.slots = {}
+        self.selected = 0
+        # Bumped on every change to the slots, so the HUD knows when to redraw
+        self.version = 0
+
+    def select(self, slot):
+        if 0 <= slot < self.size:
+            self.selected = slot
+
+    def is_tool_selected(self):
+        return self.selected < len(self.tools)
+
+    def get_selected_tool(self):
+        if self.selected < len(self.tools):
+            return self.tools[self.selected]
+        return None
+
+    def get_selected_block(self):
+        """The block id in the selected slot, or None for a tool or an empty slot."""
+        slot = self.selected - len(self.tools)
+        if slot >= 0 and self.counts[slot] > 0:
+            return self.block_ids[slot]
+        return None
+
+    def get_item(self, slot):
+        """The tool or block name in a hotbar slot, or None if it's empty."""
+        if slot < len(self.tools):
+            return self.tools[slot]
+        slot -= len(self.tools)
+        if self.counts[slot] > 0:
+            return BLOCK_NAMES[self.block_ids[slot]]
+        return None
+
+    def get_count(self, block_id):
+        slot = self.slots.get(block_id)
+        return self.counts[slot] if slot is not None else 0
+
+    def add(self, block_id, count=1):
+        """Adds blocks to their slot, or the first empty one. False if there's no room."""
+        slot = self.slots.get(block_id)
+        if slot is None:
+            if 0 not in self.counts:
+                return False
+            slot = self.counts.index(0)
+            self.block_ids[slot] = block_id
+            self.slots[block_id] = slot
+        self.counts[slot] += count
+        self.version += 1
+        return True
+
+    def remove(self, block_id, count=1):
+        slot = self.slots.get(block_id)
+        if slot is None:
+            return False
+        if self.counts[slot] > count:
+            self.counts[slot] -= count
+            self.version += 1
+        else:
+            self.set_block_slot(slot, 0, 0)
+        return True
+
+    def set_block_slot(self, slot, block_id, count):
+        # Slots set one at a time can briefly hold the same block twice while it
+        # moves, so the mapping is only dropped if it still points here
+        old_id = self.block_ids[slot]
+        if self.counts[slot] > 0 and self.slots.get(old_id) == slot:
+            del self.slots[old_id]
+        self.block_ids[slot] = block_id if count > 0 else 0
+        self.counts[slot] = count
+        if count > 0:
+            self.slots[block_id] = slot
+        self.version += 1
+
+    def get_block_slots(self):
+        return list(zip(self.block_ids, self.counts))
@@ -0,0 +1,190 @@
+from collections import deque
+
+from blocks import BLOCK_LIGHT, BLOCK_OPACITY
+
+MAX_LIGHT = 15
+SKY = 0
+BLOCK = 1
+
+# The day/night cycle is split into this many steps, each with a
+# precomputed sky color and sky light level
+SKY_PHASES = 64
+
+
+def build_sky_tables():
+    light_blue = (135, 206, 235)
+    dark_blue = (25, 25, 112)
+    colors = []
+    levels = []
+    for phase in range(SKY_PHASES):
+        transition_progress = (phase / SKY_PHASES) ** 2
+        colors.append(tuple(int(day * (1 - transition_progress) + night * transition_progress)
+                            for day, night in zip(light_blue, dark_blue)))
+        # Full sky light at the start of the day down to 4 at the end of the night
+        levels.append(MAX_LIGHT - round(transition_progress * 11))
+    return colors, levels
+
+
+SKY_COLORS, DAYLIGHT = build_sky_tables()
+
+# Maps block ids to the light they give off, for bytes.translate
+EMISSION = bytes(BLOCK_LIGHT + [0] * (256 - len(BLOCK_LIGHT)))
+
+# What a tile's colour is multiplied by at each light level
+SHADES = []
+for level in range(MAX_LIGHT + 1):
+    factor = int(255 * max(0.2, 0.85 ** (MAX_LIGHT - level)))
+    SHADES.append((factor, factor, factor))
+
+
+class Lighting:
+    """Keeps a sky light and a block light level for every cell of the loaded chunks.
+
+    Light spreads out from its sources by flood fill, losing
+    BLOCK_OPACITY[block] levels as it leaves each cell, except that full
+    sky light falls straight down through open cells. New chunks are lit
+    on their own and then joined up with their neighbours, and a changed
+    block only relights the cells its old and new light reached.
+    """
+
+    def __init__(self, world):
+        self.world = world
+
+    def light_chunk(self, chunk):
+        world = self.world
+        height, width = world.world_height, world.chunk_width
+        base_x = chunk.x * width
+        sky, block = chunk.light
+        queues = (deque(), deque())
+
+        depths = []
+        for lx in range(width):
+            column = lx * height
+            # Sky light comes straight down to the first block that stops it
+            depth = 0
+            while depth < height - 1 and BLOCK_OPACITY[chunk.blocks[column + depth]] == 1:
+                depth += 1
+            sky[column:column + depth + 1] = bytes([MAX_LIGHT]) * (depth + 1)
+            depths.append(depth)
+
+        block[:] = chunk.blocks.translate(EMISSION)
+        queues[BLOCK].extend((base_x + i // height, i % height) for i, level in enumerate(block) if level)
+
+        # Only the sides of each sunlit column can spread any further
+        for lx, depth in enumerate(depths):
+            if 0 < lx < width - 1:
+                top = min(depth, depths[lx - 1], depths[lx + 1])
+            else:
+                top = 0
+            queues[SKY].extend((base_x + lx, row) for row in range(top, depth + 1))
+
+        # Light already in the neighbouring chunks spreads across the border
+        for border_x in (base_x - 1, base_x + width):
+            neighbour = world.chunks.get(border_x // width)
+            if neighbour is None:
+                continue
+            column = (border_x - neighbour.x * width) * height
+            for channel in (SKY, BLOCK):
+                levels = neighbour.light[channel]
+                queues[channel].extend((border_x, row) for row in range(height) if levels[column + row] > 1)
+
+        changed = set()
+        for channel in (SKY, BLOCK):
+            self.spread(channel, queues[channel], changed)
+        changed = {key for key in changed if key[0] != chunk.x}
+        world.invalidate_light(changed)
+
+    def update_cell(self, x, row):
+        """Relights around a cell whose block just changed."""
+        world = self.world
+        chunk = world.chunks[x // world.chunk_width]
+        i = (x - chunk.x * world.chunk_width) * world.world_height + row
+        changed = {(chunk.x, row // world.section_height)}
+
+        for channel in (SKY, BLOCK):
+            levels = chunk.light[channel]
+            old_level = levels[i]
+            levels[i] = 0
+            relight = self.remove(channel, deque([(x, row, old_level)]), changed) if old_level else deque()
+
+            if channel == SKY:
+                source = MAX_LIGHT if row == 0 else 0
+            else:
+                source = BLOCK_LIGHT[chunk.blocks[i]]
+            if source:
+                levels[i] = source
+                relight.append((x, row))
+            # The neighbours shine back into the cell, through whatever is there now
+            relight.extend(self.neighbours(x, row))
+            self.spread(channel, relight, changed)
+
+        world.invalidate_light(changed, immediate=True)
+
+    def neighbours(self, x, row):
+        cells = [(x - 1, row), (x + 1, row)]
+        if row > 0:
+            cells.append((x, row - 1))
+        if row < self.world.world_height - 1:
+            cells.append((x, row + 1))
+        return cells
+
+    def spread(self, channel, queue, changed):
+        """Flood fills light outward from the cells in queue."""
+        world = self.world
+        chunks, width, height, section_height = world.chunks, world.chunk_width, world.world_height, world.section_height
+        while queue:
+            x, row = queue.popleft()
+            chunk = chunks.get(x // width)
+            if chunk is None:
+                continue
+            i = (x - chunk.x * width) * height + row
+            level = chunk.light[channel][i]
+            opacity = BLOCK_OPACITY[chunk.blocks[i]]
+            out_level = level - opacity
+            falls = channel == SKY and level == MAX_LIGHT and opacity == 1
+
+            for nx, nrow in self.neighbours(x, row):
+                n_level = MAX_LIGHT if falls and nrow == row + 1 else out_level
+                if n_level <= 0:
+                    continue
+                neighbour = chunk if nx // width == chunk.x else chunks.get(nx // width)
+                if neighbour is None:
+                    continue
+                j = (nx - neighbour.x * width) * height + nrow
+                levels = neighbour.light[channel]
+                if levels[j] < n_level:
+                    levels[j] = n_level
+                    changed.add((neighbour.x, nrow // section_height))
+                    queue.append((nx, nrow))
+
+    def remove(self, channel, queue, changed):
+        """Darkens the cells lit through the cells in queue.
+
+        Returns the cells at the edge of the darkened area, which still
+        have light of their own to spread back in.
+        """
+        world = self.world
+        chunks, width, height, section_height = world.chunks, world.chunk_width, world.world_height, world.section_height
+        relight = deque()
+        while queue:
+            x, row, old_level = queue.popleft()
+            for nx, nrow in self.neighbours(x, row):
+                neighbour = chunks.get(nx // width)
+                if neighbour is None:
+                    continue
+                j = (nx - neighbour.x * width) * height + nrow
+                levels = neighbour.light[channel]
+                n_level = levels[j]
+                if n_level == 0:
+                    continue
+                fell = channel == SKY and nrow == row + 1 and n_level == old_level == MAX_LIGHT
+                if (n_level < old_level or fell) and not (channel == SKY and nrow == 0):
+                    levels[j] = 0
+                    changed.add((neighbour.x, nrow // section_height))
+                    queue.append((nx, nrow, n_level))
+                    if channel == BLOCK and BLOCK_LIGHT[neighbour.blocks[j]]:
+                        levels[j] = BLOCK_LIGHT[neighbour.blocks[j]]
+                        relight.append((nx, nrow))
+                else:
+                    relight.append((nx, nrow))
+        return relight
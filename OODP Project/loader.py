@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pygame
+from camera import Camera
+from player import Player
+from world import World
+
+
+class WorldLoader:
+    """Loads or creates the world on a background thread while the menu is up.
+
+    Besides the world it makes the player, loads the world and player
+    textures and bakes the terrain in view, so by the time PLAY is clicked
+    the game has next to nothing left to do before its first frame.
+    progress goes from 0 to 1 and stage says what is being done, for the
+    menu to show. Nothing else may touch the world until get() returns it.
+    """
+
+    def __init__(self, save=None, screen_size=(800, 600), terrain=None):
+        self.save = save
+        # Only used for a new world, a saved one keeps the terrain it was made with
+        self.terrain = terrain
+        self.screen_size = screen_size
+        self.progress = 0
+        self.stage = "Starting"
+        self.world = None
+        self.player = None
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def is_done(self):
+        return not self.thread.is_alive()
+
+    def set_stage(self, stage, progress):
+        self.stage = stage
+        self.progress = progress
+
+    def run(self):
+        try:
+            self.load()
+        except Exception as error:
+            # Raised again on the main thread by get()
+            self.error = error
+
+    def load(self):
+        save = self.save
+        if save is not None and save.exists():
+            self.set_stage("Loading world", 0)
+            world = save.load_world()
+            player = Player(0, 0)
+            save.load_player(player)
+        else:
+            self.set_stage("Generating world", 0)
+            world = World(terrain=self.terrain, save=save)
+            player = Player(0, 0)
+
+        # A saved player can be anywhere, so the chunks around them are requested here. The
+        # ones generated on the workers are waited for, so the first ticks don't install them.
+        chunk_x = world.get_chunk_x(player.get_pos()[0])
+        world.update_chunks(chunk_x)
+        pending = len(world.pending_chunks)
+        while world.pending_chunks:
+            self.set_stage("Generating chunks", 0.1 + 0.5 * (1 - len(world.pending_chunks) / pending))
+            time.sleep(0.002)
+            world.update_chunks(chunk_x)
+
+        self.set_stage("Loading textures", 0.6)
+        world.textures.preload()
+        player.textures.preload()
+
+        # Drawing a frame off screen once shades the block textures, bakes every
+        # section in view and composes the minimap
+        self.set_stage("Building terrain", 0.8)
+        camera = Camera(*self.screen_size)
+        camera.update(player)
+        target = pygame.Surface(self.screen_size)
+        world.render(target, camera, player)
+        world.render_entities(target, camera)
+        if world.minimap is not None:
+            world.minimap.render(target, player)
+
+        self.world = world
+        self.player = player
+        self.set_stage("Ready", 1)
+
+    def get(self):
+        """Waits for the world if it isn't ready yet and returns (world, player)."""
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.world, self.player
+
+    def close(self):
+        """Shuts down a world that was loaded but never played."""
+        self.thread.join()
+        if self.world is not None:
+            self.world.close()
@@ -1,80 +1,214 @@
+import argparse
 import pygame
 import sys
+import time
 from world import World
 from player import Player
 from camera import Camera
 from menu import Menu
+from profiler import FrameProfiler
+from notifications import Notifications
+from terrain_view import TerrainView
+from world_save import WorldSave
+from input_trace import TraceRecorder
+from loader import WorldLoader
+from terrain import SPRINGS
 
 class Game:
-    def __init__(self):
+    def __init__(self, world=None, save=None, render_mode='capped', terrain_render='scroll', trace=None, player=None):
         pygame.init()
-        self.screen = pygame.display.set_mode((800, 600))
+        # capped renders at most 60 FPS, uncapped as fast as it can and vsync at the display rate
+        self.render_mode = render_mode
+        self.screen = None
+        if render_mode == 'vsync':
+            try:
+                self.screen = pygame.display.set_mode((800, 600), pygame.SCALED, vsync=1)
+            except pygame.error:
+                self.render_mode = 'uncapped'
+        if self.screen is None:
+            self.screen = pygame.display.set_mode((800, 600))
         pygame.display.set_caption("Block Survival")
-        self.world = World()
-        self.player = Player(0, 0)
+        self.save = save
+        if world is None:
+            if save is not None and save.exists():
+                world = save.load_world()
+            else:
+                world = World(save=save)
+        self.world = world
+        # A WorldLoader hands over the player it made with the world
+        if player is None:
+            player = Player(0, 0)
+            if save is not None and save.exists():
+                save.load_player(player)
+        self.player = player
+        self.autosave_interval = 30
+        self.last_autosave = time.time()
         self.clock = pygame.time.Clock()
+        self.max_fps = 60 if self.render_mode == 'capped' else 0
+
+        # The simulation always steps at tick_rate, however fast frames are drawn
+        self.tick_rate = 60
+        self.tick_time = 1 / self.tick_rate
+        self.max_ticks_per_frame = 5
         self.font = pygame.font.Font(None, 36)
         self.camera = Camera(800, 600)
+        # scroll reuses the last terrain frame, full redraws every section each frame
+        self.terrain_view = TerrainView(self.world) if terrain_render == 'scroll' else None
+        self.notifications = Notifications()
+        self.last_lives = self.player.lives
+        self.game_over_until = None
+        # A TraceRecorder, when the session's input is being recorded
+        self.trace = trace
+        # Other players in a networked game, by id, drawn but simulated on the server
+        self.other_players = {}
+        self.profiler = FrameProfiler(['events', 'chunks', 'physics', 'camera', 'save', 'terrain', 'entities', 'hud', 'overlay', 'flip'])
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F3:
+                    self.profiler.toggle_overlay()
+                elif event.key == pygame.K_F4:
+                    self.profiler.toggle_csv()
+                elif event.key == pygame.K_m and self.world.minimap is not None:
+                    self.world.minimap.toggle()
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:
-                    item = self.player.inventory[self.player.item_held]
-                    self.world.handle_click(self.player, self.camera, event.pos, item, event.button)
-
-                elif event.button == 3:
-                    if self.player.is_tool_selected:
-                        continue
-                    else:
-                        selected_block = list(self.player.block_inventory.keys())[self.player.item_held]
-                        self.world.handle_click(self.player, self.camera, event.pos, selected_block, event.button)
+                self.click(event.button, event.pos)
         return True
 
-    def update(self):
-        self.player.update(self.camera, self.world)
-        self.camera.update(self.player)
+    def click(self, button, pos):
+        if self.trace is not None:
+            # Stored in world pixels, the camera depends on how frames were interpolated
+            self.trace.record_click(button, int(pos[0] + self.camera.offset.x), int(pos[1] + self.camera.offset.y))
+        self.world.handle_click(self.player, self.camera, pos, button)
+
+    def update(self, keys=None):
+        if keys is None:
+            keys = pygame.key.get_pressed()
+        if self.trace is not None:
+            self.trace.record_tick(keys)
+
+        # Once the game is over only the overlay runs, until it expires
+        if self.game_over_until is not None:
+            return time.perf_counter() < self.game_over_until
+
+        self.world.update(self.player)
+        self.profiler.mark('chunks')
+        self.player.update(self.camera, self.world, keys)
+        self.profiler.mark('physics')
 
+        # The frame only copies the chunks changed since the last save, a thread writes them.
+        # A player who just lost their last life isn't saved, like on quitting.
+        if (self.save is not None and self.player.lives > 0
+                and time.time() - self.last_autosave > self.autosave_interval):
+            self.save.save(self.world, self.player)
+            self.last_autosave = time.time()
+        self.profiler.mark('save')
+
+        self.show_lost_life()
         if self.player.lives <= 0:
             self.game_over()
-            return False
-        else:
-            return True
+        return True
 
-    def render(self):
-        self.screen.fill((255, 255, 255))
-        self.world.render(self.screen, self.camera, self.player)
-        self.player.render(self.screen, self.camera)
+    def render(self, alpha=1.0):
+        self.camera.update(self.player, alpha)
+        self.profiler.mark('camera')
+        if self.terrain_view is not None:
+            self.terrain_view.render(self.screen, self.camera, self.player)
+        else:
+            self.world.render(self.screen, self.camera, self.player)
+        self.profiler.mark('terrain')
+        self.world.render_entities(self.screen, self.camera, alpha)
+        self.profiler.mark('entities')
+        for player in self.other_players.values():
+            player.render_body(self.screen, self.camera, alpha)
+        self.player.render(self.screen, self.camera, alpha)
+        if self.world.minimap is not None:
+            self.world.minimap.render(self.screen, self.player)
+        self.notifications.render(self.screen)
+        self.profiler.mark('hud')
+        self.profiler.render(self.screen)
+        self.profiler.mark('overlay')
         pygame.display.flip()
+        self.profiler.mark('flip')
     
+    def show_lost_life(self):
+        # Losing the last life shows Game Over instead
+        if self.player.lives < self.last_lives and self.player.lives > 0:
+            self.notifications.show("One Life Lost", 0.75, 20, (255, 0, 0), (400, 450), shadow_offset=3)
+        self.last_lives = self.player.lives
+
     def game_over(self):
         """Handles game over logic."""
-        font = pygame.font.Font("assets/gui/menu_font.ttf", 50)
-        text = font.render("Game Over", True, (0, 0, 0))
-        text_rect = text.get_rect(center=(400, 300))
-        screen = pygame.display.get_surface()
-        screen.blit(text, text_rect)
-        pygame.display.flip()
-        pygame.time.wait(1000)
-        pygame.quit()
+        self.notifications.show("Game Over", 1, 50, (0, 0, 0), (400, 300))
+        self.game_over_until = time.perf_counter() + 1
 
     def run(self):
         running = True
+        accumulator = 0
+        previous_time = time.perf_counter()
         while running:
+            self.profiler.begin_frame()
+            now = time.perf_counter()
+            accumulator += now - previous_time
+            previous_time = now
+
             running = self.handle_events()
-            if running:
+            self.profiler.mark('events')
+
+            # Run as many fixed ticks as the elapsed time covers
+            ticks = 0
+            while running and accumulator >= self.tick_time:
                 running = self.update()
+                accumulator -= self.tick_time
+                ticks += 1
+                # After a long stall drop the backlog instead of trying to catch up
+                if ticks == self.max_ticks_per_frame:
+                    accumulator = min(accumulator, self.tick_time)
+                    break
+
             if running:
-                self.render()
-            self.clock.tick(60)
+                self.render(accumulator / self.tick_time)
+            self.profiler.end_frame()
+            self.clock.tick(self.max_fps)
+        self.profiler.close()
+        if self.trace is not None:
+            self.trace.close(self)
+        self.world.close()
+        if self.save is not None:
+            if self.player.lives > 0:
+                self.save.save(self.world, self.player)
+            self.save.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Block Survival")
+    parser.add_argument('--render-mode', choices=['capped', 'uncapped', 'vsync'], default='capped')
+    parser.add_argument('--terrain-render', choices=['scroll', 'full'], default='scroll')
+    parser.add_argument('--record', metavar='TRACE', help="record the session's input to a trace for replay.py")
+    parser.add_argument('--seed', type=int, help="world seed for a recorded session")
+    parser.add_argument('--springs', action='store_true', help="give new worlds underground water springs")
+    args = parser.parse_args()
+    terrain = SPRINGS if args.springs else None
+
     menu = Menu()
-    game_run = menu.main_menu()
+    # The world loads while the menu is up. Recorded sessions start a fresh world
+    # and generate chunks on the main thread, so when each chunk arrives depends
+    # only on the input, and theirs is only made after PLAY.
+    loader = None if args.record else WorldLoader(WorldSave('saves/world'), terrain=terrain)
+    game_run = menu.main_menu(loader)
     if game_run:
-        game = Game()
+        if args.record:
+            world = World(seed=args.seed, terrain=terrain, workers=0)
+            game = Game(world, render_mode=args.render_mode, terrain_render=args.terrain_render,
+                        trace=TraceRecorder(args.record, world))
+        else:
+            world, player = loader.get()
+            game = Game(world, save=loader.save, render_mode=args.render_mode,
+                        terrain_render=args.terrain_render, player=player)
         game.run()
+    elif loader is not None:
+        loader.close()
     pygame.quit()
     sys.exit()
\ No newline at end of file
@@ -1,51 +1,83 @@
 import pygame
 import sys
+from asset_manager import asset_manager
 
 class Menu:
     def __init__(self):
         pygame.init()
         self.SCREEN = pygame.display.set_mode((800, 600))
         pygame.display.set_caption("Menu")
-        self.BG = pygame.image.load("assets/gui/menu_background.jpg")
+        self.BG = pygame.image.load("assets/gui/menu_background.jpg").convert()
+        self.clock = pygame.time.Clock()
+        self.fps = 60
+        self.fonts = {}
+        # The loading line under the buttons, and where it was last drawn
+        self.loading_text = None
+        self.loading_rect = None
         pygame.mixer.music.load('assets/gui/game_music.mp3')
         pygame.mixer.music.set_volume(0.5)
         pygame.mixer.music.play(-1)
 
     def get_font(self, size):
-        return pygame.font.Font("assets/gui/menu_font.ttf", size)
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font("assets/gui/menu_font.ttf", size)
+            self.fonts[size] = font
+        return font
+
+    def restore_background(self, rect):
+        self.SCREEN.blit(self.BG, rect, rect)
+
+    def update_buttons(self, buttons, position, force=False):
+        """Redraws the buttons whose hover state changed and returns their rects."""
+        dirty = []
+        for button in buttons:
+            if button.changeColor(position) or force:
+                self.restore_background(button.rect)
+                button.update(self.SCREEN)
+                dirty.append(button.rect)
+        return dirty
+
+    def update_loading(self, loader, force=False):
+        """Redraws the world loading line if it changed and returns the area to update, or None."""
+        if loader.is_done():
+            text = "World ready"
+        else:
+            text = f"{loader.stage}... {round(loader.progress * 100)}%"
+        if text == self.loading_text and not force:
+            return None
+        surface = self.get_font(20).render(text, True, "White")
+        rect = surface.get_rect(center=(400, 560))
+        area = rect.union(self.loading_rect) if self.loading_rect is not None else rect
+        self.restore_background(area)
+        self.SCREEN.blit(surface, rect)
+        self.loading_text = text
+        self.loading_rect = rect
+        return area
+
+    def load_volume_icon(self):
+        Vol_icon = pygame.image.load("assets/gui/volume_icon.jpg").convert_alpha()
+        # Knock out the near-white background in one pass instead of pixel by pixel
+        background = pygame.mask.from_threshold(Vol_icon, (248, 248, 248), (8, 8, 8, 255))
+        Vol_icon = background.to_surface(setcolor=(255, 255, 255, 0), unsetsurface=Vol_icon)
+        return pygame.transform.scale(Vol_icon, (90, 90))
 
     def options(self):
+        OPTIONS_BACK = Button(image=None, pos=(400, 450),
+                              text_input="BACK", font=self.get_font(75), base_color="White", hovering_color="Green")
+
+        self.SCREEN.blit(self.BG, (0, 0))
+        lines = ["D: Moving right", "A: Moving left", "Spacebar: Jump", "Number keys: Change item", "L Shift: Sprint", "M: Minimap"]
+        for i, line in enumerate(lines):
+            OPTIONS_TEXT = self.get_font(30).render(line, True, "White")
+            OPTIONS_RECT = OPTIONS_TEXT.get_rect(center=(400, 150 + i * 50))
+            self.SCREEN.blit(OPTIONS_TEXT, OPTIONS_RECT)
+        self.update_buttons([OPTIONS_BACK], pygame.mouse.get_pos(), force=True)
+        pygame.display.update()
+
         while True:
             OPTIONS_MOUSE_POS = pygame.mouse.get_pos()
-
-            menu_bg2 = pygame.image.load("assets/gui/menu_background.jpg")
-            self.SCREEN.blit(menu_bg2, (0, 0))
-
-            OPTIONS_TEXT_1 = self.get_font(30).render("D: Moving right", True, "White")
-            OPTIONS_RECT_1 = OPTIONS_TEXT_1.get_rect(center=(400, 150))
-            self.SCREEN.blit(OPTIONS_TEXT_1, OPTIONS_RECT_1)
-
-            OPTIONS_TEXT_2 = self.get_font(30).render("A: Moving left", True, "White")
-            OPTIONS_RECT_2 = OPTIONS_TEXT_2.get_rect(center=(400, 200))
-            self.SCREEN.blit(OPTIONS_TEXT_2, OPTIONS_RECT_2)
-
-            OPTIONS_TEXT_3 = self.get_font(30).render("Spacebar: Jump", True, "White")
-            OPTIONS_RECT_3 = OPTIONS_TEXT_3.get_rect(center=(400, 250))
-            self.SCREEN.blit(OPTIONS_TEXT_3, OPTIONS_RECT_3)
-
-            OPTIONS_TEXT_4 = self.get_font(30).render("Number keys: Change item", True, "White")
-            OPTIONS_RECT_4 = OPTIONS_TEXT_4.get_rect(center=(400, 300))
-            self.SCREEN.blit(OPTIONS_TEXT_4, OPTIONS_RECT_4)
-
-            OPTIONS_TEXT_5 = self.get_font(30).render("L Shift: Spirint", True, "White")
-            OPTIONS_RECT_5 = OPTIONS_TEXT_5.get_rect(center=(400, 350))
-            self.SCREEN.blit(OPTIONS_TEXT_4, OPTIONS_RECT_4)
-
-            OPTIONS_BACK = Button(image=None, pos=(400, 450),
-                                  text_input="BACK", font=self.get_font(75), base_color="White", hovering_color="Green")
-
-            OPTIONS_BACK.changeColor(OPTIONS_MOUSE_POS)
-            OPTIONS_BACK.update(self.SCREEN)
+            dirty = self.update_buttons([OPTIONS_BACK], OPTIONS_MOUSE_POS)
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -55,28 +87,40 @@ class Menu:
                     if OPTIONS_BACK.checkForInput(OPTIONS_MOUSE_POS):
                         return
 
-            pygame.display.update()
+            if dirty:
+                pygame.display.update(dirty)
+            self.clock.tick(self.fps)
 
     def volume_menu(self):
         running = True
         slider_rect = pygame.Rect(300, 300, 200, 10)
         knob_x = slider_rect.x + int(pygame.mixer.music.get_volume() * slider_rect.width)
+        # Covers the slider and the knob at either end of it
+        slider_area = slider_rect.inflate(24, 24)
+
+        BACK_BUTTON = Button(image=None, pos=(400, 500),
+                             text_input="BACK", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
+
+        self.SCREEN.blit(self.BG, (0, 0))
+        VOLUME_TEXT = self.get_font(40).render("Volume", True, "White")
+        VOLUME_RECT = VOLUME_TEXT.get_rect(center=(400, 200))
+        self.SCREEN.blit(VOLUME_TEXT, VOLUME_RECT)
+        self.update_buttons([BACK_BUTTON], pygame.mouse.get_pos(), force=True)
+        drawn_knob_x = None
 
         while running:
-            menu_bg = pygame.image.load("assets/gui/menu_background.jpg")
-            self.SCREEN.blit(menu_bg, (0, 0))
             VOLUME_MOUSE_POS = pygame.mouse.get_pos()
-            VOLUME_TEXT = self.get_font(40).render("Volume", True, "White")
-            VOLUME_RECT = VOLUME_TEXT.get_rect(center=(400, 200))
-            self.SCREEN.blit(VOLUME_TEXT, VOLUME_RECT)
+            dirty = self.update_buttons([BACK_BUTTON], VOLUME_MOUSE_POS)
 
-            pygame.draw.rect(self.SCREEN, (200, 200, 200), slider_rect)
-            pygame.draw.circle(self.SCREEN, (0, 0, 0), (knob_x, slider_rect.y + slider_rect.height // 2), 10)
+            if knob_x != drawn_knob_x:
+                self.restore_background(slider_area)
+                pygame.draw.rect(self.SCREEN, (200, 200, 200), slider_rect)
+                pygame.draw.circle(self.SCREEN, (0, 0, 0), (knob_x, slider_rect.y + slider_rect.height // 2), 10)
+                dirty.append(slider_area)
+                drawn_knob_x = knob_x
 
-            BACK_BUTTON = Button(image=None, pos=(400, 500),
-                                 text_input="BACK", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
-            BACK_BUTTON.changeColor(VOLUME_MOUSE_POS)
-            BACK_BUTTON.update(self.SCREEN)
+            if dirty:
+                pygame.display.update(dirty)
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -93,59 +137,74 @@ class Menu:
                         volume = (knob_x - slider_rect.x) / slider_rect.width
                         pygame.mixer.music.set_volume(volume)
 
-            pygame.display.update()
+            self.clock.tick(self.fps)
 
-    def main_menu(self):
-        Vol_icon = pygame.image.load("assets/gui/volume_icon.jpg").convert_alpha()
-        for x in range(Vol_icon.get_width()):
-            for y in range(Vol_icon.get_height()):
-                color = Vol_icon.get_at((x, y))
-                if color.r > 240 and color.g > 240 and color.b > 240:
-                    Vol_icon.set_at((x, y), (255, 255, 255, 0))
+    def main_menu(self, loader=None):
+        """Runs the menu until PLAY or QUIT, returns True for PLAY.
 
-        Vol_icon = pygame.transform.scale(Vol_icon, (90, 90))
+        With a WorldLoader the menu shows how far it has got, and PLAY waits
+        for it to finish if it hasn't yet.
+        """
+        Vol_icon = self.load_volume_icon()
         Vol_icon_rect = Vol_icon.get_rect(topleft=(720, 0.5))
 
+        MENU_TEXT = self.get_font(60).render("Block Survival", True, "Black")
+        MENU_RECT = MENU_TEXT.get_rect(center=(400, 70))
+
+        gray_box = asset_manager.image("assets/gui/gray_box.png")
+        PLAY_BUTTON = Button(image=gray_box, pos=(400, 200),
+                             text_input="PLAY", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
+        OPTIONS_BUTTON = Button(image=gray_box, pos=(400, 330),
+                                text_input="CONTROLS", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
+        QUIT_BUTTON = Button(image=gray_box, pos=(400, 460),
+                             text_input="QUIT", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
+        buttons = [PLAY_BUTTON, OPTIONS_BUTTON, QUIT_BUTTON]
+
         game_run = True
+        redraw = True
+        play_clicked = False
         while game_run:
-            self.SCREEN.blit(self.BG, (0, 0))
-
             MENU_MOUSE_POS = pygame.mouse.get_pos()
 
-            MENU_TEXT = self.get_font(60).render("Block Survival", True, "Black")
-            MENU_RECT = MENU_TEXT.get_rect(center=(400, 70))
-
-            PLAY_BUTTON = Button(image=pygame.image.load("assets/gui/gray_box.png"), pos=(400, 200),
-                                 text_input="PLAY", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
-            OPTIONS_BUTTON = Button(image=pygame.image.load("assets/gui/gray_box.png"), pos=(400, 330),
-                                    text_input="CONTROLS", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
-            QUIT_BUTTON = Button(image=pygame.image.load("assets/gui/gray_box.png"), pos=(400, 460),
-                                 text_input="QUIT", font=self.get_font(30), base_color="#d7fcd4", hovering_color="Black")
-
-            self.SCREEN.blit(MENU_TEXT, MENU_RECT)
-
-            for button in [PLAY_BUTTON, OPTIONS_BUTTON, QUIT_BUTTON]:
-                button.changeColor(MENU_MOUSE_POS)
-                button.update(self.SCREEN)
-
-            self.SCREEN.blit(Vol_icon, Vol_icon_rect)
+            # The whole screen is only drawn on entry and when coming back from a sub menu
+            if redraw:
+                self.SCREEN.blit(self.BG, (0, 0))
+                self.SCREEN.blit(MENU_TEXT, MENU_RECT)
+                self.update_buttons(buttons, MENU_MOUSE_POS, force=True)
+                self.SCREEN.blit(Vol_icon, Vol_icon_rect)
+                if loader is not None:
+                    self.loading_rect = None
+                    self.update_loading(loader, force=True)
+                pygame.display.update()
+                redraw = False
+            else:
+                dirty = self.update_buttons(buttons, MENU_MOUSE_POS)
+                if loader is not None:
+                    area = self.update_loading(loader)
+                    if area is not None:
+                        dirty.append(area)
+                if dirty:
+                    pygame.display.update(dirty)
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     game_run = False
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if PLAY_BUTTON.checkForInput(MENU_MOUSE_POS):
-                        return True
+                        # Starts as soon as the world is ready
+                        play_clicked = True
                     if OPTIONS_BUTTON.checkForInput(MENU_MOUSE_POS):
                         self.options()
-                        game_run = True
+                        redraw = True
                     if QUIT_BUTTON.checkForInput(MENU_MOUSE_POS):
                         game_run = False
                     if Vol_icon_rect.collidepoint(event.pos):
                         self.volume_menu()
-                        game_run = True
-            if game_run:
-                pygame.display.update()
+                        redraw = True
+
+            if play_clicked and (loader is None or loader.is_done()):
+                return True
+            self.clock.tick(self.fps)
         return game_run
 
 class Button():
@@ -156,24 +215,29 @@ class Button():
         self.font = font
         self.base_color, self.hovering_color = base_color, hovering_color
         self.text_input = text_input
-        self.text = self.font.render(self.text_input, True, self.base_color)
+        # Both text colours are rendered up front, hovering just swaps between them
+        self.base_text = self.font.render(self.text_input, True, self.base_color)
+        self.hovering_text = self.font.render(self.text_input, True, self.hovering_color)
+        self.text = self.base_text
+        self.hovering = False
         if self.image is None:
             self.image = self.text
         self.rect = self.image.get_rect(center=(self.x_pos, self.y_pos))
         self.text_rect = self.text.get_rect(center=(self.x_pos, self.y_pos))
 
     def update(self, screen):
-        if self.image is not None:
+        if self.image is not None and self.image is not self.base_text:
             screen.blit(self.image, self.rect)
         screen.blit(self.text, self.text_rect)
 
     def checkForInput(self, position):
-        if position[0] in range(self.rect.left, self.rect.right) and position[1] in range(self.rect.top, self.rect.bottom):
-            return True
-        return False
+        return self.rect.collidepoint(position)
 
     def changeColor(self, position):
-        if position[0] in range(self.rect.left, self.rect.right) and position[1] in range(self.rect.top, self.rect.bottom):
-            self.text = self.font.render(self.text_input, True, self.hovering_color)
-        else:
-            self.text = self.font.render(self.text_input, True, self.base_color)
\ No newline at end of file
+        """Picks the text colour for the mouse position, returns True if it changed."""
+        hovering = self.rect.collidepoint(position)
+        if hovering == self.hovering:
+            return False
+        self.hovering = hovering
+        self.text = self.hovering_text if hovering else self.base_text
+        return True
@@ -0,0 +1,124 @@
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from asset_manager import asset_manager
+from blocks import BLOCK_TEXTURES
+
+AIR_COLOR = (135, 206, 235)
+# Shown where the map runs past the loaded chunks
+UNLOADED = 255
+UNLOADED_COLOR = (20, 20, 20)
+
+
+def get_block_colors():
+    """One color per block id, the average of the block's texture."""
+    colors = []
+    for path in BLOCK_TEXTURES:
+        if path is None:
+            colors.append(AIR_COLOR)
+        else:
+            colors.append(tuple(pygame.transform.average_color(asset_manager.image(path), consider_alpha=True))[:3])
+    return colors
+
+
+class Minimap:
+    """A one pixel per block map of the world around the player.
+
+    Each loaded chunk has a small 8-bit surface whose palette is the block
+    colors, so building it is one surfarray copy of the chunk's block ids
+    and a block change is one pixel write. The map on screen is composed
+    from those, and only again when the player moves a block or a chunk in
+    view changes.
+    """
+
+    def __init__(self, world, size=(64, 48), scale=2):
+        self.world = world
+        # size is in blocks, each drawn as scale by scale pixels
+        self.size = size
+        self.scale = scale
+        self.visible = True
+        self.palette = None
+        self.chunk_maps = {}
+        self.image = None
+        self.key = None
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def get_palette(self):
+        if self.palette is None:
+            colors = get_block_colors()
+            self.palette = colors + [UNLOADED_COLOR] * (256 - len(colors))
+        return self.palette
+
+    def get_chunk_map(self, chunk_x):
+        chunk = self.world.chunks.get(chunk_x)
+        if chunk is None:
+            return None
+        cached = self.chunk_maps.get(chunk_x)
+        # A chunk unloaded and loaded again is a new object with new blocks
+        if cached is not None and cached[0] is chunk:
+            return cached[1]
+        world = self.world
+        surface = pygame.Surface((world.chunk_width, world.world_height), 0, 8)
+        surface.set_palette(self.get_palette())
+        blocks = np.frombuffer(chunk.blocks, dtype=np.uint8).reshape(world.chunk_width, world.world_height)
+        pygame.surfarray.blit_array(surface, blocks)
+        self.chunk_maps[chunk_x] = (chunk, surface)
+        return surface
+
+    def block_changed(self, tile_x, row, block_id):
+        world = self.world
+        cached = self.chunk_maps.get(world.get_chunk_x(tile_x))
+        if cached is not None:
+            cached[1].set_at((tile_x % world.chunk_width, row), self.get_palette()[block_id])
+
+    def render(self, screen, player):
+        if not self.visible:
+            return
+        world = self.world
+        width, height = self.size
+        tile_x, tile_y = player.get_pos()
+        left = tile_x - width // 2
+        top = max(0, min(tile_y + world.world_height // 2 - height // 2, world.world_height - height))
+        first_chunk = world.get_chunk_x(left)
+        last_chunk = world.get_chunk_x(left + width - 1)
+        chunks = [world.chunks.get(chunk_x) for chunk_x in range(first_chunk, last_chunk + 1)]
+        key = (left, top, tuple(chunk.version if chunk is not None else None for chunk in chunks))
+        if key != self.key:
+            self.image = self.compose(left, top, first_chunk, last_chunk, tile_y + world.world_height // 2 - top)
+            self.key = key
+        # Bottom right, clear of the hotbar and of the profiler overlay in the top right
+        screen_width, screen_height = screen.get_size()
+        screen.blit(self.image, (screen_width - self.image.get_width() - 10, screen_height - self.image.get_height() - 10))
+
+    def compose(self, left, top, first_chunk, last_chunk, player_row):
+        world = self.world
+        width, height = self.size
+        for chunk_x in [chunk_x for chunk_x in self.chunk_maps if chunk_x not in world.chunks]:
+            del self.chunk_maps[chunk_x]
+
+        image = pygame.Surface((width, height), 0, 8)
+        image.set_palette(self.get_palette())
+        image.fill(UNLOADED)
+        for chunk_x in range(first_chunk, last_chunk + 1):
+            chunk_map = self.get_chunk_map(chunk_x)
+            if chunk_map is not None:
+                image.blit(chunk_map, (chunk_x * world.chunk_width - left, -top))
+
+        # Scaled and converted once here so the blit each frame is a plain copy
+        image = pygame.transform.scale(image.convert(), (width * self.scale, height * self.scale))
+        pygame.draw.rect(image, (255, 0, 0), ((width // 2) * self.scale, player_row * self.scale, self.scale, self.scale * 2))
+        pygame.draw.rect(image, (0, 0, 0), image.get_rect(), 1)
+        return image
+
+
+def make_minimap(world):
+    # The chunk maps are filled through surfarray, which needs NumPy
+    if np is None:
+        return None
+    return Minimap(world)
@@ -0,0 +1,154 @@
+import socket
+import struct
+import zlib
+
+# Every message is a type and a payload length, then the payload. The high
+# bit of the type marks a payload that was worth compressing with zlib.
+MESSAGE_HEADER = struct.Struct('<BI')
+COMPRESSED = 0x80
+COMPRESS_OVER = 128
+
+# Server to client
+WELCOME, CHUNK, UNLOAD, TICK = 1, 2, 3, 4
+# Client to server
+INPUT, CLICK = 16, 17
+
+# player id, seed, terrain generator, render distance
+WELCOME_DATA = struct.Struct('<HQ16sH')
+# chunk x, followed by the chunk's block ids
+CHUNK_HEADER = struct.Struct('<i')
+UNLOAD_DATA = struct.Struct('<i')
+# Held keys as a bit mask over input_trace.TRACE_KEYS
+INPUT_DATA = struct.Struct('<H')
+# Mouse button and the click position in world pixels
+CLICK_DATA = struct.Struct('<Bii')
+
+# A tick is its number followed by sections of fixed-size entries, each
+# section starting with its entry count. Only what changed since the last
+# tick sent to that client is in it.
+TICK_NUMBER = struct.Struct('<I')
+COUNT = struct.Struct('<I')
+CELL = struct.Struct('<ihB')
+PLAYER_POSITION = struct.Struct('<Hii')
+PLAYER_ID = struct.Struct('<H')
+ENTITY = struct.Struct('<IBBii')
+ENTITY_ID = struct.Struct('<I')
+# The receiving player's own lives, stamina and selected slot, then its block slots
+PLAYER_STATE = struct.Struct('<BfB')
+SLOT = struct.Struct('<BI')
+
+
+class Connection:
+    """A non-blocking TCP socket that sends and receives whole messages."""
+
+    def __init__(self, sock):
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.received = bytearray()
+        self.outgoing = bytearray()
+        self.closed = False
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def send(self, kind, payload=b''):
+        """Queues a message, flush() writes the queue to the socket."""
+        if len(payload) > COMPRESS_OVER:
+            compressed = zlib.compress(payload, 1)
+            if len(compressed) < len(payload):
+                kind |= COMPRESSED
+                payload = compressed
+        self.outgoing += MESSAGE_HEADER.pack(kind, len(payload))
+        self.outgoing += payload
+
+    def flush(self):
+        while self.outgoing and not self.closed:
+            try:
+                sent = self.sock.send(self.outgoing)
+            except BlockingIOError:
+                return
+            except OSError:
+                self.closed = True
+                return
+            self.bytes_sent += sent
+            del self.outgoing[:sent]
+
+    def receive(self):
+        """Reads whatever has arrived and returns the whole messages in it as (type, payload)."""
+        while not self.closed:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                data = b''
+            if not data:
+                self.closed = True
+                break
+            self.bytes_received += len(data)
+            self.received += data
+
+        messages = []
+        offset = 0
+        while len(self.received) - offset >= MESSAGE_HEADER.size:
+            kind, length = MESSAGE_HEADER.unpack_from(self.received, offset)
+            end = offset + MESSAGE_HEADER.size + length
+            if end > len(self.received):
+                break
+            payload = bytes(self.received[offset + MESSAGE_HEADER.size:end])
+            if kind & COMPRESSED:
+                kind &= ~COMPRESSED
+                payload = zlib.decompress(payload)
+            messages.append((kind, payload))
+            offset = end
+        del self.received[:offset]
+        return messages
+
+    def close(self):
+        self.flush()
+        self.sock.close()
+        self.closed = True
+
+
+def encode_section(entry, entries):
+    return COUNT.pack(len(entries)) + b''.join(entry.pack(*values) for values in entries)
+
+
+def encode_tick(tick, cells, players, removed_players, entities, removed_entities, player_state):
+    """Packs one tick's changes. cells is already packed, so a server can share it between clients."""
+    return b''.join([
+        TICK_NUMBER.pack(tick),
+        COUNT.pack(len(cells) // CELL.size), cells,
+        encode_section(PLAYER_POSITION, players),
+        encode_section(PLAYER_ID, [(player_id,) for player_id in removed_players]),
+        encode_section(ENTITY, entities),
+        encode_section(ENTITY_ID, [(entity_id,) for entity_id in removed_entities]),
+        player_state or b'',
+    ])
+
+
+def decode_tick(payload):
+    """Unpacks a tick into its number, the entries of each section and the player state, if sent."""
+    tick, = TICK_NUMBER.unpack_from(payload)
+    offset = TICK_NUMBER.size
+    sections = []
+    for entry in [CELL, PLAYER_POSITION, PLAYER_ID, ENTITY, ENTITY_ID]:
+        count, = COUNT.unpack_from(payload, offset)
+        offset += COUNT.size
+        end = offset + count * entry.size
+        sections.append(list(entry.iter_unpack(payload[offset:end])))
+        offset = end
+    player_state = decode_player_state(payload, offset) if offset < len(payload) else None
+    return tick, sections, player_state
+
+
+def encode_player_state(player):
+    inventory = player.inventory
+    return (PLAYER_STATE.pack(max(player.lives, 0), player.stamina, inventory.selected)
+            + b''.join(SLOT.pack(block_id, count) for block_id, count in inventory.get_block_slots()))
+
+
+def decode_player_state(payload, offset):
+    lives, stamina, selected = PLAYER_STATE.unpack_from(payload, offset)
+    slots = list(SLOT.iter_unpack(payload[offset + PLAYER_STATE.size:]))
+    return lives, stamina, selected, slots
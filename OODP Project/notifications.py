@@ -0,0 +1,43 @@
+import time
+
+import pygame
+
+
+class Notifications:
+    """Timed messages drawn over the game by the main loop.
+
+    Showing a message never waits: it is rendered once when it is shown,
+    blitted every frame until it expires and then dropped.
+    """
+
+    def __init__(self):
+        self.active = []
+        self.fonts = {}
+
+    def get_font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font("assets/gui/menu_font.ttf", size)
+            self.fonts[size] = font
+        return font
+
+    def show(self, text, duration, size, color, center, shadow_offset=0):
+        # Showing the same message again restarts it instead of stacking a copy
+        self.active = [notification for notification in self.active if notification[0] != text]
+
+        font = self.get_font(size)
+        layers = []
+        if shadow_offset:
+            shadow = font.render(text, True, (0, 0, 0))
+            layers.append((shadow, shadow.get_rect(center=(center[0] + shadow_offset, center[1] + shadow_offset))))
+        surface = font.render(text, True, color)
+        layers.append((surface, surface.get_rect(center=center)))
+        self.active.append((text, time.perf_counter() + duration, layers))
+
+    def render(self, screen):
+        if not self.active:
+            return
+        now = time.perf_counter()
+        self.active = [notification for notification in self.active if notification[1] > now]
+        for _, _, layers in self.active:
+            screen.blits(layers, doreturn=False)
@@ -0,0 +1,118 @@
+import csv
+import time
+from collections import deque
+
+import pygame
+
+
+class FrameProfiler:
+    """Times each part of a frame and shows the results in an overlay.
+
+    Call begin_frame() at the top of the frame, mark(name) after each part
+    and end_frame() at the bottom. While neither the overlay nor a CSV dump
+    is on, every call returns straight away.
+    """
+
+    def __init__(self, sections, history=240):
+        self.sections = sections
+        self.samples = {name: deque(maxlen=history) for name in sections + ['total']}
+        self.frame_times = {}
+        self.frame_start = 0
+        self.last_mark = 0
+        self.frame_count = 0
+        self.enabled = False
+        # Toggling happens mid-frame, so it only takes effect from the next frame
+        self.timing = False
+
+        # Overlay attributes
+        self.show_overlay = False
+        self.overlay = None
+        self.overlay_interval = 0.5
+        self.overlay_updated = 0
+        self.font = None
+
+        # CSV dump attributes
+        self.csv_file = None
+        self.csv_writer = None
+
+    def begin_frame(self):
+        self.timing = self.enabled
+        if not self.timing:
+            return
+        self.frame_times = dict.fromkeys(self.sections, 0)
+        self.frame_start = self.last_mark = time.perf_counter()
+
+    def mark(self, name):
+        if not self.timing:
+            return
+        now = time.perf_counter()
+        self.frame_times[name] += now - self.last_mark
+        self.last_mark = now
+
+    def end_frame(self):
+        if not self.timing:
+            return
+        self.frame_times['total'] = self.last_mark - self.frame_start
+        for name, elapsed in self.frame_times.items():
+            self.samples[name].append(elapsed)
+        self.frame_count += 1
+        if self.csv_writer is not None:
+            self.csv_writer.writerow([self.frame_count] + [f"{self.frame_times[name] * 1000:.4f}" for name in self.sections + ['total']])
+
+    def update_enabled(self):
+        self.enabled = self.show_overlay or self.csv_writer is not None
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+        self.overlay = None
+        self.update_enabled()
+
+    def toggle_csv(self, path=None):
+        if self.csv_file is not None:
+            self.csv_file.close()
+            self.csv_file = None
+            self.csv_writer = None
+        else:
+            if path is None:
+                path = time.strftime("profile_%Y%m%d_%H%M%S.csv")
+            self.csv_file = open(path, 'w', newline='')
+            self.csv_writer = csv.writer(self.csv_file)
+            self.csv_writer.writerow(['frame'] + [f"{name}_ms" for name in self.sections + ['total']])
+        self.update_enabled()
+
+    def close(self):
+        if self.csv_file is not None:
+            self.toggle_csv()
+
+    def get_stats(self, name):
+        samples = sorted(self.samples[name])
+        if not samples:
+            return 0, 0
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        return sum(samples) / len(samples) * 1000, p99 * 1000
+
+    def render(self, screen):
+        if not self.show_overlay:
+            return
+
+        # The text only changes a couple of times a second, so reuse the surface in between
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_updated > self.overlay_interval:
+            if self.font is None:
+                self.font = pygame.font.Font(None, 20)
+            rows = [("section", "avg ms", "p99 ms")]
+            for name in self.sections + ['total']:
+                average, p99 = self.get_stats(name)
+                rows.append((name, f"{average:.2f}", f"{p99:.2f}"))
+            if self.csv_writer is not None:
+                rows.append(("recording CSV", "", ""))
+
+            line_height = self.font.get_linesize()
+            self.overlay = pygame.Surface((200, line_height * len(rows) + 8), pygame.SRCALPHA)
+            self.overlay.fill((0, 0, 0, 160))
+            for i, row in enumerate(rows):
+                for column_x, text in zip((6, 90, 145), row):
+                    self.overlay.blit(self.font.render(text, True, (255, 255, 255)), (column_x, 4 + i * line_height))
+            self.overlay_updated = now
+
+        screen.blit(self.overlay, (screen.get_width() - self.overlay.get_width() - 10, 10))
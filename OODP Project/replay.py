@@ -0,0 +1,101 @@
+"""Replays a recorded input trace headlessly, as fast as it will run.
+
+Record a session with main.py --record, then:
+
+    python replay.py trace.bin
+    python replay.py trace.bin --no-render --csv timings.csv
+
+The replay checks that it ends on the same player, block and entity state
+as the recorded session and reports how long every tick took, so a hitch
+from a real session can be profiled and checked again after a change.
+"""
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import csv
+import sys
+import time
+
+import pygame
+from benchmark import summarize
+from input_trace import TraceReader, get_state_digest
+from main import Game
+from world import World
+
+
+def replay(trace, render=True, terrain_render='scroll'):
+    world = World(seed=trace.seed, terrain=trace.terrain, render_distance=trace.render_distance, workers=0)
+    game = Game(world, terrain_render=terrain_render)
+    timings = []
+
+    for record in trace.records():
+        if record[0] == 'click':
+            _, button, x, y = record
+            game.click(button, (x - game.camera.offset.x, y - game.camera.offset.y))
+            continue
+
+        start = time.perf_counter()
+        game.update(record[1])
+        update_time = time.perf_counter() - start
+        render_time = 0
+        if render:
+            start = time.perf_counter()
+            game.render()
+            render_time = time.perf_counter() - start
+        timings.append((update_time, render_time))
+
+    digest = get_state_digest(game)
+    world.close()
+    return timings, digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded input trace")
+    parser.add_argument('trace', help="trace file written by main.py --record")
+    parser.add_argument('--no-render', action='store_true', help="only run the simulation")
+    parser.add_argument('--terrain-render', choices=['scroll', 'full'], default='scroll')
+    parser.add_argument('--csv', help="write per tick timings to this file")
+    parser.add_argument('--slowest', type=int, default=5, help="how many of the slowest ticks to list")
+    args = parser.parse_args()
+    trace_path = os.path.abspath(args.trace)
+    csv_path = os.path.abspath(args.csv) if args.csv else None
+
+    # Assets are loaded relative to the game directory
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    pygame.init()
+
+    trace = TraceReader(trace_path)
+    start = time.perf_counter()
+    timings, digest = replay(trace, not args.no_render, args.terrain_render)
+    elapsed = time.perf_counter() - start
+    pygame.quit()
+
+    print(f"replayed {len(timings)} ticks of seed {trace.seed} in {elapsed:.2f} s")
+    columns = [('update', 0)] if args.no_render else [('update', 0), ('render', 1)]
+    for name, column in columns:
+        mean, p99, worst = summarize([timing[column] for timing in timings])
+        print(f"    {name:<6} mean={mean:7.3f} ms  p99={p99:7.3f} ms  max={worst:8.3f} ms")
+    slowest = sorted(range(len(timings)), key=lambda tick: -sum(timings[tick]))[:args.slowest]
+    print("    slowest ticks: " + ", ".join(f"{tick} ({sum(timings[tick]) * 1000:.2f} ms)" for tick in slowest))
+
+    if csv_path is not None:
+        with open(csv_path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['tick', 'update_ms', 'render_ms'])
+            for tick, (update_time, render_time) in enumerate(timings):
+                writer.writerow([tick, f"{update_time * 1000:.3f}", f"{render_time * 1000:.3f}"])
+
+    if trace.digest is None:
+        print("the trace has no end state, the recorded session didn't close cleanly")
+    elif digest == trace.digest:
+        print("end state matches the recording")
+    else:
+        print("end state differs from the recording")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Runs a world with no window for players who connect over TCP.
+
+    python server.py
+    python server.py --port 25570 --seed 42
+    python client.py --port 25570
+
+The server is the only place the world is simulated. Clients send the keys
+they hold and their clicks; every tick the server steps the world and all
+players, then sends each client what changed near its player. A chunk is
+sent whole the first time it comes into a client's range, after that only
+the cells that change in it are.
+"""
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import socket
+import statistics
+import time
+import zlib
+
+import pygame
+from camera import Camera
+from input_trace import TraceKeys
+from net import (Connection, WELCOME, CHUNK, UNLOAD, TICK, INPUT, CLICK, WELCOME_DATA, CHUNK_HEADER, UNLOAD_DATA,
+                 INPUT_DATA, CLICK_DATA, CELL, encode_tick, encode_player_state)
+from player import Player
+from terrain import SPRINGS
+from world import World
+
+
+class RemotePlayer:
+    """A connected client, its player and what it has been sent so far."""
+
+    def __init__(self, player_id, connection):
+        self.id = player_id
+        self.connection = connection
+        self.player = Player(0, 0)
+        self.keys = TraceKeys(0)
+        self.clicks = []
+        self.known_chunks = set()
+        self.sent_players = {}
+        self.sent_entities = {}
+        self.sent_state = None
+
+
+class Server:
+    def __init__(self, world, host='127.0.0.1', port=25570):
+        self.world = world
+        self.world.changed_cells = []
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.port = self.listener.getsockname()[1]
+        self.clients = {}
+        self.next_id = 1
+        # Clicks arrive in world pixels, so they are handled with the camera at 0, 0
+        self.camera = Camera(800, 600)
+        self.tick_count = 0
+        self.tick_rate = 60
+        # Compressed chunk snapshots by chunk x, shared by every client they go to
+        self.snapshots = {}
+        self.bytes_sent = 0
+
+    def accept(self):
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except BlockingIOError:
+                return
+            client = RemotePlayer(self.next_id, Connection(sock))
+            self.next_id += 1
+            self.clients[client.id] = client
+            world = self.world
+            client.connection.send(WELCOME, WELCOME_DATA.pack(client.id, world.seed, world.generator.name.encode(),
+                                                              world.render_distance))
+
+    def receive(self):
+        for client in list(self.clients.values()):
+            for kind, payload in client.connection.receive():
+                if kind == INPUT:
+                    client.keys = TraceKeys(INPUT_DATA.unpack(payload)[0])
+                elif kind == CLICK:
+                    client.clicks.append(CLICK_DATA.unpack(payload))
+            if client.connection.closed:
+                client.connection.close()
+                del self.clients[client.id]
+
+    def tick(self):
+        self.accept()
+        self.receive()
+        world = self.world
+        clients = list(self.clients.values())
+        if clients:
+            for client in clients:
+                for button, x, y in client.clicks:
+                    world.handle_click(client.player, self.camera, (x, y), button)
+                client.clicks.clear()
+            world.update(*[client.player for client in clients])
+            for client in clients:
+                client.player.update(self.camera, world, client.keys)
+                if client.player.lives <= 0:
+                    self.respawn(client.player)
+        self.tick_count += 1
+        self.sync()
+
+    def respawn(self, player):
+        player.rect.topleft = (0, 0)
+        player.velocity.update(0, 0)
+        player.lives = 5
+        player.stamina = player.max_stamina
+
+    def sync(self):
+        world = self.world
+        # Changed cells are packed once per chunk, each client gets the chunks it knows
+        cells = {}
+        for tile_x, tile_y, block_id in world.changed_cells:
+            cells.setdefault(world.get_chunk_x(tile_x), {})[(tile_x, tile_y)] = block_id
+        world.changed_cells.clear()
+        packed_cells = {chunk_x: b''.join(CELL.pack(x, y, block_id) for (x, y), block_id in chunk_cells.items())
+                        for chunk_x, chunk_cells in cells.items()}
+        for chunk_x in cells:
+            self.snapshots.pop(chunk_x, None)
+        for chunk_x in [chunk_x for chunk_x in self.snapshots if chunk_x not in world.chunks]:
+            del self.snapshots[chunk_x]
+
+        positions = {client.id: client.player.rect.topleft for client in self.clients.values()}
+        entities = None
+        if world.entities is not None:
+            a = world.entities.arrays
+            n = world.entities.count
+            entities = (a['id'][:n], a['kind'][:n], a['item'][:n],
+                        a['x'][:n].round().astype(int), a['y'][:n].round().astype(int))
+
+        for client in self.clients.values():
+            self.sync_client(client, packed_cells, positions, entities)
+            sent = client.connection.bytes_sent
+            client.connection.flush()
+            self.bytes_sent += client.connection.bytes_sent - sent
+
+    def sync_client(self, client, packed_cells, positions, entities):
+        world = self.world
+        connection = client.connection
+        player_chunk_x = world.get_chunk_x(client.player.get_pos()[0])
+
+        # Whole chunks as they come into range, unloads once they are well out of it
+        new_chunks = []
+        for chunk_x in range(player_chunk_x - world.load_radius, player_chunk_x + world.load_radius + 1):
+            if chunk_x in world.chunks and chunk_x not in client.known_chunks:
+                connection.send(CHUNK, self.get_snapshot(chunk_x))
+                client.known_chunks.add(chunk_x)
+                new_chunks.append(chunk_x)
+        for chunk_x in list(client.known_chunks):
+            if abs(chunk_x - player_chunk_x) > world.unload_radius or chunk_x not in world.chunks:
+                connection.send(UNLOAD, UNLOAD_DATA.pack(chunk_x))
+                client.known_chunks.discard(chunk_x)
+
+        # A snapshot sent this tick already has this tick's cells in it
+        cells = b''.join(packed_cells[chunk_x] for chunk_x in client.known_chunks
+                         if chunk_x in packed_cells and chunk_x not in new_chunks)
+
+        # Players and entities are only sent within the chunks the client has
+        low = (min(client.known_chunks, default=0)) * world.chunk_width * world.tile_size
+        high = (max(client.known_chunks, default=-1) + 1) * world.chunk_width * world.tile_size
+        players = {player_id: position for player_id, position in positions.items() if low <= position[0] < high}
+        players[client.id] = positions[client.id]
+        moved_players = [(player_id,) + position for player_id, position in players.items()
+                         if client.sent_players.get(player_id) != position]
+        removed_players = [player_id for player_id in client.sent_players if player_id not in players]
+        client.sent_players = players
+
+        moved_entities = []
+        removed_entities = []
+        if entities is not None:
+            ids, kinds, items, xs, ys = entities
+            visible = (xs >= low) & (xs < high)
+            current = dict(zip(ids[visible].tolist(),
+                               zip(kinds[visible].tolist(), items[visible].tolist(), xs[visible].tolist(), ys[visible].tolist())))
+            sent = client.sent_entities
+            moved_entities = [(entity_id,) + state for entity_id, state in current.items() if sent.get(entity_id) != state]
+            removed_entities = [entity_id for entity_id in sent if entity_id not in current]
+            client.sent_entities = current
+
+        player_state = encode_player_state(client.player)
+        if player_state == client.sent_state:
+            player_state = None
+        else:
+            client.sent_state = player_state
+
+        if cells or moved_players or removed_players or moved_entities or removed_entities or player_state:
+            connection.send(TICK, encode_tick(self.tick_count, cells, moved_players, removed_players,
+                                              moved_entities, removed_entities, player_state))
+
+    def get_snapshot(self, chunk_x):
+        snapshot = self.snapshots.get(chunk_x)
+        if snapshot is None:
+            snapshot = CHUNK_HEADER.pack(chunk_x) + zlib.compress(self.world.chunks[chunk_x].blocks)
+            self.snapshots[chunk_x] = snapshot
+        return snapshot
+
+    def run(self, report_interval=5):
+        tick_time = 1 / self.tick_rate
+        next_tick = time.perf_counter()
+        tick_times = []
+        last_report = time.perf_counter()
+        bytes_sent = 0
+        # SDL turns SIGINT and SIGTERM into a QUIT event
+        while not pygame.event.get(pygame.QUIT):
+            now = time.perf_counter()
+            if now < next_tick:
+                time.sleep(min(next_tick - now, 0.002))
+                continue
+            self.tick()
+            tick_times.append(time.perf_counter() - now)
+            next_tick += tick_time
+            # After a long stall drop the backlog instead of trying to catch up
+            if now - next_tick > 0.25:
+                next_tick = now
+
+            if now - last_report > report_interval:
+                per_client = (self.bytes_sent - bytes_sent) / max(len(self.clients), 1) / (now - last_report)
+                print(f"tick {self.tick_count}  clients={len(self.clients)}  "
+                      f"tick mean={statistics.mean(tick_times) * 1000:.3f} ms  max={max(tick_times) * 1000:.3f} ms  "
+                      f"sent={per_client / 1024:.1f} KB/s per client")
+                tick_times.clear()
+                bytes_sent = self.bytes_sent
+                last_report = now
+
+    def close(self):
+        for client in self.clients.values():
+            client.connection.close()
+        self.listener.close()
+        self.world.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Block Survival server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=25570)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--springs', action='store_true', help="give the world underground water springs")
+    args = parser.parse_args()
+
+    # Assets are loaded relative to the game directory
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    pygame.init()
+    server = Server(World(seed=args.seed, terrain=SPRINGS if args.springs else None), args.host, args.port)
+    print(f"serving seed {server.world.seed} on {args.host}:{server.port}")
+    server.run()
+    server.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
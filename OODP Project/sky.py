@@ -0,0 +1,152 @@
+import random
+import time
+
+import pygame
+from asset_manager import asset_manager
+from lighting import SKY_COLORS, DAYLIGHT, MAX_LIGHT
+
+# The sky fades from the phase's color to a paler horizon between these world y pixels
+GRADIENT_TOP = -1280
+GRADIENT_BOTTOM = 0
+HORIZON_COLOR = (225, 240, 255)
+
+# The cloud layer wraps around every STRIP_WIDTH pixels
+STRIP_WIDTH = 1600
+STRIP_HEIGHT = 160
+CLOUD_COUNT = 10
+# How far the clouds move for each pixel the camera moves, and how fast they drift
+CLOUD_PARALLAX = 0.3
+CLOUD_SPEED = 8
+# Screen y of the cloud layer with the camera at y 0
+CLOUD_Y = -60
+
+
+def get_brightness(phase):
+    """How far a phase is from the darkest night (0) to full day (1)."""
+    return (DAYLIGHT[phase] - DAYLIGHT[-1]) / (MAX_LIGHT - DAYLIGHT[-1])
+
+
+def get_horizon_color(phase):
+    # The horizon is paler the more daylight there is, at night it's close to the sky
+    paleness = 0.1 + 0.35 * get_brightness(phase)
+    return tuple(round(sky + (horizon - sky) * paleness) for sky, horizon in zip(SKY_COLORS[phase], HORIZON_COLOR))
+
+
+class Sky:
+    """Draws the sky gradient and the cloud layer behind the terrain.
+
+    The gradient is an 8-bit surface of palette indices, made once, with a
+    palette for each day/night phase. When the phase changes its palette
+    is put in and the gradient is drawn into a band in the display format, so
+    each frame it's one plain blit. The band is anchored to the world and
+    scrolls with the terrain. The clouds are baked into one strip that
+    wraps around, scrolls slower than the camera and drifts on its own, so
+    they are one or two blits more.
+    """
+
+    def __init__(self, seed):
+        self.textures = asset_manager.texture_set({'cloud': 'assets/gui/cloud2.PNG'})
+        self.start_time = time.time()
+        self.size = (0, 0)
+        # Gradient palettes by phase, and the band the current one is drawn into
+        self.palettes = {}
+        self.gradient = None
+        self.band = None
+        self.phase = None
+        self.top_color = None
+        self.horizon_color = None
+        self.band_y = 0
+        # The cloud strip at each shade it has been drawn in
+        self.strip = self.bake_clouds(seed)
+        self.shaded_strips = {}
+        self.shaded_strip = None
+        self.cloud_position = (0, 0)
+
+    def bake_clouds(self, seed):
+        # Seeded so a world looks the same every time it's replayed
+        rng = random.Random(seed)
+        strip = pygame.Surface((STRIP_WIDTH, STRIP_HEIGHT), pygame.SRCALPHA)
+        for _ in range(CLOUD_COUNT):
+            size = (rng.randint(100, 200), rng.randint(40, 70))
+            x = rng.randint(0, STRIP_WIDTH - 1)
+            y = rng.randint(0, STRIP_HEIGHT - size[1])
+            image = self.textures.scaled('cloud', size)
+            # Clouds over the end of the strip carry on at its start
+            strip.blit(image, (x, y))
+            strip.blit(image, (x - STRIP_WIDTH, y))
+        return strip
+
+    def get_shaded_strip(self, shade):
+        strip = self.shaded_strips.get(shade)
+        if strip is None:
+            strip = self.strip.copy()
+            tint = pygame.Surface(strip.get_size())
+            tint.fill((shade, shade, shade))
+            strip.blit(tint, (0, 0), special_flags=pygame.BLEND_RGB_MULT)
+            if pygame.display.get_surface() is not None:
+                strip = strip.convert_alpha()
+            # Run-length encoding skips the empty sky between clouds when blitting
+            strip.set_alpha(255, pygame.RLEACCEL)
+            self.shaded_strips[shade] = strip
+        return strip
+
+    def get_palette(self, phase):
+        palette = self.palettes.get(phase)
+        if palette is None:
+            top, horizon = SKY_COLORS[phase], get_horizon_color(phase)
+            palette = [tuple(round(a + (b - a) * i / 255) for a, b in zip(top, horizon)) for i in range(256)]
+            self.palettes[phase] = palette
+        return palette
+
+    def make_gradient(self, width):
+        height = GRADIENT_BOTTOM - GRADIENT_TOP
+        column = pygame.Surface((1, height), 0, 8)
+        # With a grey palette each row's color is its palette index
+        column.set_palette([(i, i, i) for i in range(256)])
+        for row in range(height):
+            column.set_at((0, row), (row * 256 // height,) * 3)
+        return pygame.transform.scale(column, (width, height))
+
+    def update(self, camera, phase):
+        """Works out this frame's gradient and cloud positions, before any render()."""
+        size = (camera.width, camera.height)
+        if size != self.size:
+            self.gradient = self.make_gradient(size[0])
+            self.band = pygame.Surface(self.gradient.get_size())
+            if pygame.display.get_surface() is not None:
+                self.band = self.band.convert()
+            self.size = size
+            self.phase = None
+        if phase != self.phase:
+            self.gradient.set_palette(self.get_palette(phase))
+            self.band.blit(self.gradient, (0, 0))
+            self.top_color = SKY_COLORS[phase]
+            self.horizon_color = get_horizon_color(phase)
+            self.phase = phase
+            # Clouds grey at night
+            self.shaded_strip = self.get_shaded_strip(round(255 * (0.35 + 0.65 * get_brightness(phase))))
+
+        self.band_y = GRADIENT_TOP - int(camera.offset.y)
+        drift = (time.time() - self.start_time) * CLOUD_SPEED
+        cloud_x = -int(camera.offset.x * CLOUD_PARALLAX + drift) % STRIP_WIDTH - STRIP_WIDTH
+        cloud_y = CLOUD_Y - int(camera.offset.y * CLOUD_PARALLAX)
+        self.cloud_position = (cloud_x, cloud_y)
+
+    def get_cloud_rect(self):
+        return pygame.Rect(0, self.cloud_position[1], self.size[0], STRIP_HEIGHT)
+
+    def render(self, screen):
+        width, height = self.size
+        band_bottom = self.band_y + self.band.get_height()
+        if self.band_y > 0:
+            screen.fill(self.top_color, (0, 0, width, self.band_y))
+        if band_bottom < height:
+            screen.fill(self.horizon_color, (0, band_bottom, width, height - band_bottom))
+        if band_bottom > 0 and self.band_y < height:
+            screen.blit(self.band, (0, self.band_y))
+
+        cloud_x, cloud_y = self.cloud_position
+        if -STRIP_HEIGHT < cloud_y < height:
+            screen.blit(self.shaded_strip, (cloud_x, cloud_y))
+            if cloud_x + STRIP_WIDTH < width:
+                screen.blit(self.shaded_strip, (cloud_x + STRIP_WIDTH, cloud_y))
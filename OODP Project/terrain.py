@@ -0,0 +1,245 @@
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from blocks import BLOCK_IDS, AIR
+
+LEAF_OFFSETS = [(0, -2), (0, -1), (-1, -1), (1, -1), (-1, 0), (1, 0)]
+# A terrain name ending in SPRINGS also turns some of the deep andesite into
+# sealed water springs. Without it the terrain is the same as it always was.
+SPRINGS = '+springs'
+SPRING_CHANCE = 0.02
+
+
+class TerrainGenerator:
+    """Generates chunks one column at a time with Python's random module."""
+
+    name = 'python'
+
+    def __init__(self, seed, world_height, chunk_width, springs=False):
+        self.seed = seed
+        # The name goes into saves and traces, so it says whether there are springs
+        self.springs = springs
+        if springs:
+            self.name = self.name + SPRINGS
+        self.world_height = world_height
+        self.chunk_width = chunk_width
+        self.min_height = 10
+        self.max_height = world_height - 20
+        self.spawn_height = world_height // 2 + 4
+        self.chunk_heights = {}
+
+    def column_rng(self, x):
+        # Every column gets its own generator so a chunk comes out the same
+        # no matter when, or how many times, it is generated.
+        return random.Random(self.seed * 0x100000000 + (x & 0xFFFFFFFF))
+
+    def column_change(self, x):
+        return self.column_rng(x).choice([-1, 0, 1])
+
+    def get_chunk_heights(self, chunk_x):
+        """Returns the surface row of every column in a chunk.
+
+        Heights random walk outwards from column 0 in both directions, so a
+        chunk's heights only depend on the chunk next to it on the spawn side.
+        """
+        if chunk_x in self.chunk_heights:
+            return self.chunk_heights[chunk_x]
+
+        step = 1 if chunk_x >= 0 else -1
+        cx = chunk_x
+        while cx != 0 and cx - step not in self.chunk_heights:
+            cx -= step
+
+        while True:
+            if cx > 0:
+                start = self.chunk_heights[cx - 1][-1]
+            elif cx < 0:
+                start = self.chunk_heights[cx + 1][0]
+            else:
+                start = None
+            self.chunk_heights[cx] = self.walk_heights(cx, start)
+            if cx == chunk_x:
+                return self.chunk_heights[cx]
+            cx += step
+
+    def walk_heights(self, chunk_x, start):
+        x0 = chunk_x * self.chunk_width
+        heights = [0] * self.chunk_width
+        if chunk_x >= 0:
+            columns = range(x0, x0 + self.chunk_width)
+        else:
+            columns = range(x0 + self.chunk_width - 1, x0 - 1, -1)
+
+        height = start
+        for x in columns:
+            if height is None:
+                height = self.spawn_height
+            else:
+                height = max(self.min_height, min(self.max_height, height + self.column_change(x)))
+            heights[x - x0] = height
+        return heights
+
+    def get_height(self, x):
+        return self.get_chunk_heights(x // self.chunk_width)[x % self.chunk_width]
+
+    def has_tree(self, x):
+        rng = self.column_rng(x)
+        rng.choice([-1, 0, 1])
+        return rng.random() < 0.15
+
+    def generate_column(self, x, cliff_height):
+        ids = BLOCK_IDS
+        rng = self.column_rng(x)
+        rng.choice([-1, 0, 1])
+        tree = rng.random() < 0.15
+        column = bytearray(self.world_height)
+
+        for y in range(cliff_height, self.world_height):   # Vertical terrain generation
+            if y == cliff_height:
+                block = ids['grass']
+            elif y <= cliff_height + 3:
+                block = ids['dirt']
+            elif y < cliff_height + 8:
+                block = ids['cobblestone'] if rng.random() < 0.8 else ids['dirt']
+            else:
+                ran = rng.random()
+                if ran <= 0.05:
+                    block = ids['gem']
+                elif ran <= 0.4:
+                    block = ids['cobblestone']
+                elif ran <= 0.7:
+                    block = ids['granite']
+                elif self.springs and ran > 1 - SPRING_CHANCE:
+                    block = ids['water']
+                else:
+                    block = ids['andesite']
+            column[y] = block
+
+        if tree:
+            for y in range(cliff_height - 3, cliff_height):
+                column[y] = ids['wood']
+        elif rng.random() < 0.08:
+            column[cliff_height - 1] = ids['flower1'] if rng.random() < 0.5 else ids['flower2']
+        elif rng.random() < 0.15:
+            column[cliff_height - 1] = ids['bomb']
+        return column
+
+    def generate_chunk(self, chunk_x):
+        """Returns the chunk's block ids column by column, top row first."""
+        x0 = chunk_x * self.chunk_width
+        columns = [self.generate_column(x0 + i, height) for i, height in enumerate(self.get_chunk_heights(chunk_x))]
+
+        # Trees in the columns just outside the chunk still drop leaves into it
+        for x in range(x0 - 1, x0 + self.chunk_width + 1):
+            if not self.has_tree(x):
+                continue
+            top = self.get_height(x) - 3
+            for dx, dy in LEAF_OFFSETS:
+                nx, ny = x + dx - x0, top + dy
+                if 0 <= nx < self.chunk_width and 0 <= ny < self.world_height:
+                    if columns[nx][ny] == AIR:
+                        columns[nx][ny] = BLOCK_IDS['leaves']
+        return bytearray().join(columns)
+
+
+class NumpyTerrainGenerator(TerrainGenerator):
+    """Generates a whole chunk at once with NumPy array operations.
+
+    Heights, strata, ores and decorations each come from their own seeded
+    stream per chunk, so the same seed always gives the same world.
+    """
+
+    name = 'numpy'
+
+    def __init__(self, seed, world_height, chunk_width, springs=False):
+        if np is None:
+            raise ImportError("The numpy terrain generator needs numpy installed")
+        super().__init__(seed, world_height, chunk_width, springs)
+        self.rows = np.arange(world_height)
+
+    def chunk_rng(self, chunk_x, stream):
+        return np.random.default_rng([self.seed, chunk_x & 0xFFFFFFFF, stream])
+
+    def walk_heights(self, chunk_x, start):
+        changes = self.chunk_rng(chunk_x, 0).integers(-1, 2, self.chunk_width)
+        if start is None:
+            start = self.spawn_height
+            changes[0] = 0
+        heights = np.clip(start + np.cumsum(changes), self.min_height, self.max_height)
+        if chunk_x < 0:
+            heights = heights[::-1]
+        return heights.tolist()
+
+    def tree_columns(self, chunk_x):
+        return self.chunk_rng(chunk_x, 1).random(self.chunk_width) < 0.15
+
+    def has_tree(self, x):
+        return bool(self.tree_columns(x // self.chunk_width)[x % self.chunk_width])
+
+    def generate_ids(self, chunk_x):
+        """Returns a (chunk_width, world_height) array of block ids."""
+        ids = BLOCK_IDS
+        heights = np.array(self.get_chunk_heights(chunk_x))
+        depth = self.rows[None, :] - heights[:, None]
+        strata = self.chunk_rng(chunk_x, 2).random(depth.shape)
+
+        blocks = np.zeros(depth.shape, dtype=np.uint8)
+        blocks[depth == 0] = ids['grass']
+        blocks[(depth >= 1) & (depth <= 3)] = ids['dirt']
+        band = (depth >= 4) & (depth < 8)
+        blocks[band] = np.where(strata[band] < 0.8, ids['cobblestone'], ids['dirt'])
+        deep = depth >= 8
+        conditions = [strata[deep] <= 0.05, strata[deep] <= 0.4, strata[deep] <= 0.7]
+        choices = [ids['gem'], ids['cobblestone'], ids['granite']]
+        if self.springs:
+            conditions.append(strata[deep] > 1 - SPRING_CHANCE)
+            choices.append(ids['water'])
+        blocks[deep] = np.select(conditions, choices, ids['andesite'])
+
+        # Trees and surface decorations
+        trees = self.tree_columns(chunk_x)
+        blocks[trees[:, None] & (depth >= -3) & (depth < 0)] = ids['wood']
+        decor = self.chunk_rng(chunk_x, 3).random((self.chunk_width, 2))
+        flowers = ~trees & (decor[:, 0] < 0.08)
+        bombs = ~trees & ~flowers & (decor[:, 1] < 0.15)
+        columns = np.arange(self.chunk_width)
+        blocks[columns[flowers], heights[flowers] - 1] = np.where(
+            decor[flowers, 1] < 0.5, ids['flower1'], ids['flower2'])
+        blocks[columns[bombs], heights[bombs] - 1] = ids['bomb']
+
+        # Leaves, including those dropped in by trees in the neighbouring columns
+        x0 = chunk_x * self.chunk_width
+        xs = np.arange(x0 - 1, x0 + self.chunk_width + 1)
+        padded = np.concatenate(([self.has_tree(x0 - 1)], trees, [self.has_tree(x0 + self.chunk_width)]))
+        tops = np.array([self.get_height(x0 - 1)] + heights.tolist() + [self.get_height(x0 + self.chunk_width)]) - 3
+        xs, tops = xs[padded] - x0, tops[padded]
+        for dx, dy in LEAF_OFFSETS:
+            nx, ny = xs + dx, tops + dy
+            inside = (nx >= 0) & (nx < self.chunk_width) & (ny >= 0) & (ny < self.world_height)
+            nx, ny = nx[inside], ny[inside]
+            air = blocks[nx, ny] == AIR
+            blocks[nx[air], ny[air]] = ids['leaves']
+        return blocks
+
+    def generate_chunk(self, chunk_x):
+        return bytearray(self.generate_ids(chunk_x).tobytes())
+
+
+GENERATORS = {
+    'python': TerrainGenerator,
+    'numpy': NumpyTerrainGenerator,
+}
+
+
+def make_generator(name, seed, world_height, chunk_width):
+    """name is a key of GENERATORS, or empty or None for the fastest one installed, optionally followed by SPRINGS."""
+    springs = name is not None and name.endswith(SPRINGS)
+    if springs:
+        name = name[:-len(SPRINGS)]
+    if not name:
+        name = 'numpy' if np is not None else 'python'
+    return GENERATORS[name](seed, world_height, chunk_width, springs)
@@ -0,0 +1,106 @@
+import pygame
+
+
+class TerrainView:
+    """Draws the sky and terrain by scrolling the previous frame.
+
+    The last frame is kept in a surface the size of the screen. Each frame
+    it is shifted by however far the camera moved. Only three kinds of area
+    are drawn again: the strips that scrolled into view, the band of cloud
+    layer (which moves slower than the terrain, and drifts), and the
+    sections whose baked surface changed. Everything is redrawn on the first
+    frame, when the sky phase changes, and when the camera jumps by a screen
+    or more.
+    """
+
+    def __init__(self, world):
+        self.world = world
+        self.frame = None
+        self.offset = None
+        self.sky_phase = None
+        self.cloud_position = None
+        self.cloud_rect = None
+        # Surface drawn for each visible (chunk x, section) last frame
+        self.drawn = {}
+        self.section_size = (world.chunk_width * world.tile_size, world.section_height * world.tile_size)
+
+    def render(self, screen, camera, player):
+        world = self.world
+        world.update_day_night_cycle()
+        world.sky.update(camera, world.sky_phase)
+
+        screen_rect = screen.get_rect()
+        sections = world.get_visible_sections(screen_rect.size, camera, player)
+        offset = (int(camera.offset.x), int(camera.offset.y))
+
+        if self.frame is None or self.frame.get_size() != screen_rect.size:
+            self.frame = pygame.Surface(screen_rect.size, 0, screen)
+            self.offset = None
+
+        if self.offset is None or world.sky_phase != self.sky_phase:
+            dx = dy = screen_rect.width
+        else:
+            dx = self.offset[0] - offset[0]
+            dy = self.offset[1] - offset[1]
+
+        if abs(dx) >= screen_rect.width or abs(dy) >= screen_rect.height:
+            self.redraw(screen_rect, sections)
+        else:
+            areas = []
+            if dx or dy:
+                self.frame.scroll(dx, dy)
+                areas.extend(self.exposed_strips(screen_rect, dx, dy))
+            if dx or dy or world.sky.cloud_position != self.cloud_position:
+                # The clouds scrolled with the terrain or drifted, put them back where they belong
+                areas.append(world.sky.get_cloud_rect().union(self.cloud_rect.move(0, dy)))
+
+            # Sections that were edited, loaded, or entered or left the render distance
+            visible = set()
+            for key, surface, position in sections:
+                visible.add(key)
+                if key not in self.drawn or self.drawn[key] is not surface:
+                    areas.append(self.section_rect(position))
+            for key in self.drawn.keys() - visible:
+                areas.append(self.section_rect(self.section_position(key, camera)))
+
+            for area in areas:
+                area = area.clip(screen_rect)
+                if area.width and area.height:
+                    self.redraw(area, sections)
+
+        self.drawn = {key: surface for key, surface, _ in sections}
+        self.offset = offset
+        self.sky_phase = world.sky_phase
+        self.cloud_position = world.sky.cloud_position
+        self.cloud_rect = world.sky.get_cloud_rect()
+        screen.blit(self.frame, (0, 0))
+
+    def exposed_strips(self, screen_rect, dx, dy):
+        strips = []
+        if dx > 0:
+            strips.append(pygame.Rect(0, 0, dx, screen_rect.height))
+        elif dx < 0:
+            strips.append(pygame.Rect(screen_rect.width + dx, 0, -dx, screen_rect.height))
+        if dy > 0:
+            strips.append(pygame.Rect(0, 0, screen_rect.width, dy))
+        elif dy < 0:
+            strips.append(pygame.Rect(0, screen_rect.height + dy, screen_rect.width, -dy))
+        return strips
+
+    def redraw(self, area, sections):
+        self.frame.set_clip(area)
+        self.world.render_sky(self.frame)
+        for _, surface, position in sections:
+            if surface is not None and area.colliderect(self.section_rect(position)):
+                self.frame.blit(surface, position)
+        self.frame.set_clip(None)
+
+    def section_rect(self, position):
+        return pygame.Rect(position, self.section_size)
+
+    def section_position(self, key, camera):
+        world = self.world
+        chunk_x, section = key
+        screen_x = chunk_x * world.chunk_width * world.tile_size - camera.offset.x
+        screen_y = (section * world.section_height - world.world_height // 2) * world.tile_size - camera.offset.y
+        return (screen_x, screen_y)
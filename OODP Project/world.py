@@ -1,213 +1,416 @@
 import pygame
-import pygame.gfxdraw
 import random
 import time
-import math
+from concurrent.futures import ThreadPoolExecutor
+from terrain import make_generator
+from asset_manager import asset_manager
+from blocks import BLOCK_NAMES, BLOCK_IDS, BLOCK_TEXTURES, BLOCK_TOOLS, BLOCK_DROP, BLOCK_REPLACEABLE, AIR, get_tool_bit
+from block_updates import BlockUpdates
+from entities import make_entities
+from minimap import make_minimap
+from sky import Sky
+from lighting import Lighting, MAX_LIGHT, SKY_PHASES, DAYLIGHT, SHADES
 
 class World:
-    def __init__(self):
+    def __init__(self, seed=None, terrain=None, render_distance=25, save=None, workers=1, remote=False):
         self.tile_size = 32
-        self.tiles = pygame.sprite.Group()
-        self.tile_map = {}
-        self.world_width = 200
         self.world_height = 200
-        self.render_distance = 25
+        self.render_distance = render_distance
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+
+        # Chunk streaming attributes
+        self.chunk_width = 16
+        self.section_height = 16
+        self.load_radius = self.render_distance // self.chunk_width + 1
+        self.unload_radius = self.load_radius + 1
+        self.chunks = {}
+        self.stored_chunks = {}
+        self.dirty_chunks = set()
+        # A remote world is a client's copy of a server's: chunks and block
+        # changes arrive over the network and nothing is generated or simulated
+        self.remote = remote
+        # Set to a list to collect (tile_x, tile_y, block_id) for every block change
+        self.changed_cells = None
+        self.generator = make_generator(terrain, self.seed, self.world_height, self.chunk_width)
+        self.lighting = Lighting(self)
+        self.block_updates = BlockUpdates(self)
+        self.entities = make_entities(self)
+        self.minimap = make_minimap(self)
+
+        # Background work attributes, workers=0 does everything on the calling thread
+        self.executor = ThreadPoolExecutor(max_workers=workers) if workers > 0 else None
+        self.pending_chunks = {}
+        self.pending_sections = {}
+        self.install_budget = 0.002
+        self.block_textures = None
+
+        # Chunks found in the save are read from disk instead of generated
+        self.save = save
+        if self.save is not None:
+            self.save.open(self)
+
         self.load_textures()
-        self.clouds = self.generate_clouds()
-        self.generate_world()
+        self.sky = Sky(self.seed)
+        if not self.remote:
+            self.update_chunks(0)
 
         self.start_time = time.time()
         self.day_night_duration = 60
+        self.update_day_night_cycle()
 
     def load_textures(self):
-        self.textures = {
-            'dirt': pygame.image.load('assets/blocks/dirt.png'),
-            'grass': pygame.image.load('assets/blocks/grass.png'),
-            'cobblestone': pygame.image.load('assets/blocks/cobblestone.png'),
-            'wood': pygame.image.load('assets/blocks/wood.png'),
-            'flower1': pygame.image.load('assets/blocks/flower1.png'),
-            'flower2': pygame.image.load('assets/blocks/flower2.png'),
-            'bomb': pygame.image.load('assets/blocks/shrooms.png'),
-            'cloud': pygame.image.load('assets/gui/cloud2.png'),
-            'gem': pygame.image.load('assets/blocks/diamond_ore.png'),
-            'leaves': pygame.image.load('assets/blocks/leaves.png'),
-            'granite': pygame.image.load('assets/blocks/granite.png'),
-            'andesite': pygame.image.load('assets/blocks/andesite.png'),
-        }
-
-    def generate_world(self):
-        world_data = []
-        cliff_height = self.world_height // 2
-
-        for y in range(self.world_height):
-            world_data.append([])
-
-        for x in range(0, self.world_width):        # Horizontal terrain generation
-            if x > 0:
-                change = random.choice([-1, 0, 1])
-                cliff_height += change
-            for y in range(0, self.world_height):   # Vertical terrain generation
-                if y > 0 and world_data[y - 1][x] == 'wood' and y < cliff_height:
-                    block = 'wood'
-                elif y == cliff_height - 3:
-                    block = 'wood' if random.random() < 0.15 else 'air'
-                elif y < cliff_height:
-                    block = 'air'
-                elif y == cliff_height:
-                    block = 'grass'
-                    if world_data[y - 1][x] != 'wood':
-                        if random.random() < 0.08:
-                            world_data[y - 1][x] = 'flower1' if random.random() < 0.5 else 'flower2'
-                        elif random.random() < 0.15:
-                            world_data[y - 1][x] = 'bomb'
-                else:
-                    if y in [cliff_height + 1, cliff_height + 2, cliff_height + 3]:
-                        block = 'dirt'
-                    elif y > cliff_height + 3 and y < cliff_height + 8:
-                        if random.random() < 0.8:
-                            block = 'cobblestone'
-                        else:
-                            block = 'dirt'
-                    else:
-                        ran = random.random()
-                        if ran <= 0.05:
-                            block = 'gem'
-                        elif ran > 0.05 and ran <= 0.4:
-                            block = 'cobblestone'
-                        elif ran > 0.4 and ran <= 0.7:
-                            block = 'granite'
-                        else:
-                            block = 'andesite'
-                world_data[y].append(block)
-
-        for x in range(self.world_width):
-            for y in range(self.world_height):
-                if world_data[y][x] == 'wood':
-                    if y - 2 >= 0 and world_data[y - 2][x] == 'air':
-                        world_data[y - 2][x] = 'leaves'
-
-                    for dx, dy in [(0, -1), (-1, -1), (1, -1), (-1, 0), (1, 0)]:
-                        nx, ny = x + dx, y + dy
-                        if 0 <= nx < self.world_width and 0 <= ny < self.world_height:
-                            if world_data[ny][nx] == 'air':
-                                world_data[ny][nx] = 'leaves'
-                    break
-        
-        for y in range(0, self.world_height):
-            for x in range(0, self.world_width):
-                if world_data[y][x] != 'air':
-                    tile = Tile(x - (self.world_width // 2), y - (self.world_height // 2), world_data[y][x], self.textures[world_data[y][x]], self.tile_size)
-                    self.tiles.add(tile)
-                    self.tile_map[(x - (self.world_width // 2), y - (self.world_height // 2))] = tile
-
-    def generate_clouds(self):
-        clouds = []
-        for _ in range(5):
-            x = random.randint(0, 800)
-            y = random.randint(0, 100)
-            cloud_width = random.randint(100, 200)
-            cloud_height = random.randint(40, 70)
-            clouds.append((x, y, cloud_width, cloud_height))
-        return clouds
+        paths = {name: path for name, path in zip(BLOCK_NAMES, BLOCK_TEXTURES) if path is not None}
+        self.textures = asset_manager.texture_set(paths)
 
-    def update_day_night_cycle(self):
-        elapsed_time = time.time() - self.start_time
-        cycle_progress = (elapsed_time % self.day_night_duration) / self.day_night_duration
-        transition_progress = cycle_progress**2
+    def get_chunk_x(self, tile_x):
+        return tile_x // self.chunk_width
+
+    def read_chunk(self, chunk_x):
+        # Chunks already in memory or on disk are cheap enough to read on the spot
+        blocks = self.stored_chunks.pop(chunk_x, None)
+        if blocks is None and self.save is not None:
+            blocks = self.save.read_chunk(chunk_x)
+        return blocks
+
+    def install_chunk(self, chunk_x, blocks, generated):
+        # New chunks go to disk too so a saved world never has to regenerate
+        if generated and self.save is not None:
+            self.dirty_chunks.add(chunk_x)
+        chunk = Chunk(chunk_x, blocks)
+        self.chunks[chunk_x] = chunk
+        self.lighting.light_chunk(chunk)
+
+    def load_chunk(self, chunk_x):
+        future = self.pending_chunks.pop(chunk_x, None)
+        if future is not None:
+            self.install_chunk(chunk_x, future.result(), True)
+            return
+        blocks = self.read_chunk(chunk_x)
+        if blocks is not None:
+            self.install_chunk(chunk_x, blocks, False)
+        else:
+            self.install_chunk(chunk_x, self.generator.generate_chunk(chunk_x), True)
+
+    def request_chunk(self, chunk_x):
+        if self.executor is None:
+            self.load_chunk(chunk_x)
+            return
+        blocks = self.read_chunk(chunk_x)
+        if blocks is not None:
+            self.install_chunk(chunk_x, blocks, False)
+        else:
+            self.pending_chunks[chunk_x] = self.executor.submit(self.generator.generate_chunk, chunk_x)
+
+    def unload_chunk(self, chunk_x):
+        chunk = self.chunks.pop(chunk_x)
+        for key in [key for key in self.pending_sections if key[0] == chunk_x]:
+            self.pending_sections.pop(key)[0].cancel()
+        # Dirty chunks can't be read back from the seed or the save yet, so keep their blocks
+        if chunk_x in self.dirty_chunks:
+            self.stored_chunks[chunk_x] = chunk.blocks
+
+    def take_dirty_chunks(self):
+        """Returns the blocks of every chunk changed since the last save and forgets them."""
+        chunks = {}
+        for chunk_x in self.dirty_chunks:
+            chunk = self.chunks.get(chunk_x)
+            chunks[chunk_x] = bytes(chunk.blocks if chunk is not None else self.stored_chunks[chunk_x])
+        self.dirty_chunks.clear()
+        # Everything left in memory is on disk now
+        self.stored_chunks.clear()
+        return chunks
+
+    def update_chunks(self, *player_chunk_xs):
+        # Each player's chunk and its neighbours cover the screen and everything
+        # the player can collide with, so they have to be there this frame
+        for player_chunk_x in player_chunk_xs:
+            for chunk_x in range(player_chunk_x - 1, player_chunk_x + 2):
+                if chunk_x not in self.chunks:
+                    self.load_chunk(chunk_x)
+
+        # Install chunks the workers have finished, within this frame's budget
+        deadline = time.perf_counter() + self.install_budget
+        for chunk_x, future in list(self.pending_chunks.items()):
+            if time.perf_counter() > deadline:
+                break
+            if future.done():
+                del self.pending_chunks[chunk_x]
+                self.install_chunk(chunk_x, future.result(), True)
+
+        # Everything further out is generated ahead of the players in the background
+        for player_chunk_x in player_chunk_xs:
+            for chunk_x in range(player_chunk_x - self.load_radius, player_chunk_x + self.load_radius + 1):
+                if chunk_x not in self.chunks and chunk_x not in self.pending_chunks:
+                    self.request_chunk(chunk_x)
+
+        for chunk_x in list(self.chunks):
+            if self.is_out_of_range(chunk_x, player_chunk_xs):
+                self.unload_chunk(chunk_x)
+        for chunk_x in list(self.pending_chunks):
+            if self.is_out_of_range(chunk_x, player_chunk_xs):
+                self.pending_chunks.pop(chunk_x).cancel()
+
+    def is_out_of_range(self, chunk_x, player_chunk_xs):
+        return all(abs(chunk_x - player_chunk_x) > self.unload_radius for player_chunk_x in player_chunk_xs)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def update(self, *players):
+        self.update_chunks(*[self.get_chunk_x(player.get_pos()[0]) for player in players])
+        self.block_updates.tick()
+        if self.entities is not None:
+            self.entities.update(players)
+
+    def get_block_id(self, tile_x, tile_y):
+        chunk = self.chunks.get(tile_x // self.chunk_width)
+        row = tile_y + self.world_height // 2
+        if chunk is None or not 0 <= row < self.world_height:
+            return AIR
+        return chunk.blocks[(tile_x - chunk.x * self.chunk_width) * self.world_height + row]
 
-        light_blue = (135, 206, 235)
-        dark_blue = (25, 25, 112)
+    def get_tiles_in_rect(self, rect):
+        # Only the grid cells under the rect can collide with it, and only
+        # those get a Tile built for them
+        tiles = []
+        for y in range(rect.top // self.tile_size, (rect.bottom - 1) // self.tile_size + 1):
+            for x in range(rect.left // self.tile_size, (rect.right - 1) // self.tile_size + 1):
+                block_id = self.get_block_id(x, y)
+                if block_id != AIR:
+                    tiles.append(Tile(x, y, block_id, self.tile_size))
+        return tiles
 
-        r = int(light_blue[0] * (1 - transition_progress) + dark_blue[0] * transition_progress)
-        g = int(light_blue[1] * (1 - transition_progress) + dark_blue[1] * transition_progress)
-        b = int(light_blue[2] * (1 - transition_progress) + dark_blue[2] * transition_progress)
+    def set_block(self, tile_pos, block_type):
+        return self.set_block_id(tile_pos[0], tile_pos[1], BLOCK_IDS[block_type])
 
-        self.sky_color = (r, g, b)
+    def set_block_id(self, tile_x, tile_y, block_id):
+        chunk = self.chunks.get(self.get_chunk_x(tile_x))
+        row = tile_y + self.world_height // 2
+        if chunk is None or not 0 <= row < self.world_height:
+            return False
+
+        index = (tile_x - chunk.x * self.chunk_width) * self.world_height + row
+        old_id = chunk.blocks[index]
+        chunk.blocks[index] = block_id
+        chunk.version += 1
+        chunk.surfaces.pop(row // self.section_height, None)
+        self.lighting.update_cell(tile_x, row)
+        # A remote world's changes are already saved and simulated on the server
+        if not self.remote:
+            self.dirty_chunks.add(chunk.x)
+            self.block_updates.block_changed(tile_x, tile_y, old_id)
+        if self.changed_cells is not None:
+            self.changed_cells.append((tile_x, tile_y, block_id))
+        if self.minimap is not None:
+            self.minimap.block_changed(tile_x, row, block_id)
+        return True
+
+    def invalidate_light(self, sections, immediate=False):
+        """Marks the (chunk x, section) surfaces whose light levels changed.
+
+        Immediate sections are dropped so they are baked again before they
+        are next drawn. The rest keep being drawn until a new bake is ready.
+        """
+        for chunk_x, section in sections:
+            chunk = self.chunks.get(chunk_x)
+            if chunk is None:
+                continue
+            # Bumped either way, so a bake already running with the old light is dropped
+            chunk.light_versions[section] = chunk.light_versions.get(section, 0) + 1
+            if immediate:
+                chunk.surfaces.pop(section, None)
+
+    def get_section_stamp(self, chunk, section):
+        # A baked surface is current while its light and the daylight haven't changed
+        return (chunk.light_versions.get(section, 0), self.daylight)
+
+    def update_day_night_cycle(self):
+        elapsed_time = time.time() - self.start_time
+        phase = int(elapsed_time % self.day_night_duration * SKY_PHASES / self.day_night_duration)
+        # The sky light of every phase is worked out once in lighting.py
+        self.sky_phase = phase
+        self.daylight = DAYLIGHT[phase]
 
     def render(self, screen, camera, player):
         self.update_day_night_cycle()
-        pygame.draw.rect(screen, self.sky_color, (0, 0, 800, 600))
+        self.sky.update(camera, self.sky_phase)
+        self.render_sky(screen)
+        for _, surface, position in self.get_visible_sections(screen.get_size(), camera, player):
+            if surface is not None:
+                screen.blit(surface, position)
+
+    def render_entities(self, screen, camera, alpha=1.0):
+        if self.entities is not None:
+            self.entities.render(screen, camera, alpha)
+
+    def render_sky(self, screen):
+        self.sky.render(screen)
 
-        for cloud in self.clouds:
-            screen.blit(self.textures['cloud'], (cloud[0], cloud[1]))
+    def get_visible_sections(self, screen_size, camera, player):
+        """Returns ((chunk x, section), surface, screen position) for every section in view.
 
+        The surface is None for sections that are all air. Sections just
+        outside the view are queued for baking as a side effect.
+        """
         player_tile_x, player_tile_y = player.get_pos()
+        screen_width, screen_height = screen_size
+
+        # Visible tiles: the render distance window clipped to the camera view
+        start_x = max(player_tile_x - self.render_distance, int(camera.offset.x // self.tile_size))
+        end_x = min(player_tile_x + self.render_distance, int((camera.offset.x + screen_width - 1) // self.tile_size))
+        start_y = max(player_tile_y - self.render_distance, int(camera.offset.y // self.tile_size))
+        end_y = min(player_tile_y + self.render_distance, int((camera.offset.y + screen_height - 1) // self.tile_size))
+
+        top_row = self.world_height // 2
+        last_section = (self.world_height - 1) // self.section_height
+        start_section = max(0, (start_y + top_row) // self.section_height)
+        end_section = min(last_section, (end_y + top_row) // self.section_height)
+        start_chunk = self.get_chunk_x(start_x)
+        end_chunk = self.get_chunk_x(end_x)
 
-        start_x = player_tile_x - self.render_distance
-        end_x = player_tile_x + self.render_distance
-        start_y = player_tile_y - self.render_distance
-        end_y = player_tile_y + self.render_distance
-
-        for y in range(start_y, end_y + 1):
-            for x in range(start_x, end_x + 1):
-                if (x, y) in self.tile_map:
-                    tile = self.tile_map[(x, y)]
-                    screen_x = tile.rect.x - camera.offset.x
-                    screen_y = tile.rect.y - camera.offset.y
-                    screen.blit(tile.image, (screen_x, screen_y))
-
-    def render_block_count(self, screen, x, y, count):
-        font = pygame.font.Font(None, 24)
-        count_text = font.render(str(count), True, (255, 255, 255))
-        screen.blit(count_text, (x + 2, y + 2))
-
-    def place_block(self, camera, player, x, y, block_type):
+        # Textures are looked up on the main thread so workers only ever read them
+        if self.block_textures is None:
+            self.block_textures = self.shade_textures([self.textures.get(name) for name in BLOCK_NAMES])
+
+        if self.executor is not None:
+            self.install_sections()
+            # Bake the sections just outside the view before the camera gets to them
+            for chunk_x in range(start_chunk - 1, end_chunk + 2):
+                chunk = self.chunks.get(chunk_x)
+                if chunk is None:
+                    continue
+                for section in range(max(0, start_section - 1), min(last_section, end_section + 1) + 1):
+                    if (chunk_x, section) in self.pending_sections:
+                        continue
+                    # Sections lit differently than when they were baked are redone here too
+                    stamp = self.get_section_stamp(chunk, section)
+                    if section not in chunk.surfaces or chunk.stamps[section] != stamp:
+                        future = self.executor.submit(self.bake_section, chunk, section, self.daylight)
+                        self.pending_sections[(chunk_x, section)] = (future, chunk.version, stamp)
+
+        sections = []
+        for chunk_x in range(start_chunk, end_chunk + 1):
+            chunk = self.chunks.get(chunk_x)
+            if chunk is None:
+                continue
+            for section in range(start_section, end_section + 1):
+                # Visible sections that aren't ready, like one just edited, are baked right away.
+                # Out of date lighting only waits for the workers if there are any.
+                if section not in chunk.surfaces or (self.executor is None and chunk.stamps[section] != self.get_section_stamp(chunk, section)):
+                    chunk.stamps[section] = self.get_section_stamp(chunk, section)
+                    chunk.surfaces[section] = self.bake_section(chunk, section, self.daylight)
+                screen_x = chunk_x * self.chunk_width * self.tile_size - camera.offset.x
+                screen_y = (section * self.section_height - top_row) * self.tile_size - camera.offset.y
+                sections.append(((chunk_x, section), chunk.surfaces[section], (screen_x, screen_y)))
+        return sections
+
+    def shade_textures(self, textures):
+        # A copy of every texture at every light level, so shading a section costs nothing extra
+        shaded = []
+        for shade in SHADES:
+            level_textures = []
+            for texture in textures:
+                if texture is not None:
+                    texture = texture.copy()
+                    texture.fill(shade, special_flags=pygame.BLEND_RGB_MULT)
+                level_textures.append(texture)
+            shaded.append(level_textures)
+        return shaded
+
+    def install_sections(self):
+        for key, (future, version, stamp) in list(self.pending_sections.items()):
+            if not future.done():
+                continue
+            del self.pending_sections[key]
+            chunk = self.chunks.get(key[0])
+            section = key[1]
+            # Drop bakes of sections edited or relit since they were queued
+            if chunk is None or chunk.version != version or stamp[0] != chunk.light_versions.get(section, 0):
+                continue
+            if section not in chunk.surfaces or chunk.stamps[section] != self.get_section_stamp(chunk, section):
+                chunk.surfaces[section] = future.result()
+                chunk.stamps[section] = stamp
+
+    def bake_section(self, chunk, section, daylight):
+        """Draws one section_height slice of a chunk, shaded by its light, into a single surface.
+
+        Returns None when the slice is all air so it is never blitted.
+        """
+        first_row = section * self.section_height
+        last_row = min(first_row + self.section_height, self.world_height)
+        textures = self.block_textures
+        sky_light, block_light = chunk.light
+        darkness = MAX_LIGHT - daylight
+        tiles = []
+        for i in range(self.chunk_width):
+            column = i * self.world_height
+            for row in range(first_row, last_row):
+                block_id = chunk.blocks[column + row]
+                if block_id != AIR:
+                    level = max(block_light[column + row], sky_light[column + row] - darkness)
+                    tiles.append((textures[level][block_id], (i * self.tile_size, (row - first_row) * self.tile_size)))
+        if not tiles:
+            return None
+        surface = pygame.Surface((self.chunk_width * self.tile_size, self.section_height * self.tile_size), pygame.SRCALPHA)
+        surface.blits(tiles, doreturn=False)
+        return surface
+
+    def place_block(self, camera, player, x, y, block_id):
         block_x = x + camera.offset.x
         block_y = y + camera.offset.y
-        tile_x = block_x // self.tile_size
-        tile_y = block_y // self.tile_size
-        tile_pos = (tile_x, tile_y)
+        tile_x = int(block_x // self.tile_size)
+        tile_y = int(block_y // self.tile_size)
 
         if abs(player.get_pos()[0] - tile_x) <= 2 and abs(player.get_pos()[1] - tile_y) <= 3:
-            if tile_pos not in self.tile_map:
-                if player.has_block_in_inventory(block_type):
-                    player.remove_block_from_inventory(block_type)
-                    tile = Tile(tile_x, tile_y, block_type, self.textures[block_type], self.tile_size)
-                    self.tiles.add(tile)
-                    self.tile_map[tile_pos] = tile
+            if BLOCK_REPLACEABLE[self.get_block_id(tile_x, tile_y)]:
+                if player.inventory.get_count(block_id) > 0:
+                    if self.set_block_id(tile_x, tile_y, block_id):
+                        player.inventory.remove(block_id)
 
     def break_block(self, camera, player, x, y, tool):
         block_x = x + camera.offset.x
         block_y = y + camera.offset.y
-        tile_x = block_x // self.tile_size
-        tile_y = block_y // self.tile_size
+        tile_x = int(block_x // self.tile_size)
+        tile_y = int(block_y // self.tile_size)
         tile_pos = (tile_x, tile_y)
 
-        block_broken = False
         if (abs(player.get_pos()[0] - tile_x) <= 2 and abs(player.get_pos()[1] - tile_y) <= 3):
-            if tile_pos in self.tile_map:
-                tile_sprite = self.tile_map[tile_pos]
-                block_type = tile_sprite.tile_type
-
-                if (tool == 'pickaxe'):
-                    if block_type in ['cobblestone', 'andesite', 'granite', 'gem', 'flower1', 'flower2'] and block_type != 'leaves':
-                        block_broken = True
-                elif (tool == 'axe'):
-                    if block_type in ['wood', 'leaves', 'flower1', 'flower2'] and block_type != 'leaves':
-                        block_broken = True
-                elif (tool == 'shovel'):
-                    if block_type in ['grass', 'dirt', 'flower1', 'flower2'] and block_type != 'leaves':
-                        block_broken = True
-                if block_broken:
-                    player.add_block_to_inventory(block_type)
-                    tile_sprite.kill()
-                    del self.tile_map[tile_pos]
-                elif block_type == 'leaves':
-                    tile_sprite.kill()
-                    del self.tile_map[tile_pos]
+            block_id = self.get_block_id(tile_x, tile_y)
+            # Which tools break which blocks, and what they drop, comes from the block registry
+            if block_id != AIR and BLOCK_TOOLS[block_id] & get_tool_bit(tool):
+                drop = BLOCK_DROP[block_id]
+                if drop is not None and self.entities is not None:
+                    self.entities.spawn_item(drop, tile_x, tile_y)
+                elif drop is not None:
+                    player.inventory.add(drop)
+                self.set_block(tile_pos, 'air')
     
-    def handle_click(self, player, camera, pos, tool, button):
+    def handle_click(self, player, camera, pos, button):
         x, y = pos
-        self.break_block(camera, player, x, y, tool)
-
-        if button == 3:
-            block_type = player.get_selected_block()
-            if block_type:
-                self.place_block(camera, player, x, y, block_type)
-
-class Tile(pygame.sprite.Sprite):
-    def __init__(self, x, y, tile_type, texture, tile_size):
-        super().__init__()
-        self.image = texture
-        self.rect = self.image.get_rect(topleft=(x * tile_size, y * tile_size))
-        self.tile_type = tile_type
\ No newline at end of file
+        # Anything but a tool breaks blocks like a bare hand
+        if button == 1:
+            self.break_block(camera, player, x, y, player.inventory.get_selected_tool())
+        elif button == 3 and not player.inventory.is_tool_selected():
+            self.break_block(camera, player, x, y, None)
+            block_id = player.inventory.get_selected_block()
+            if block_id is not None:
+                self.place_block(camera, player, x, y, block_id)
+
+class Tile:
+    def __init__(self, x, y, block_id, tile_size):
+        self.rect = pygame.Rect(x * tile_size, y * tile_size, tile_size, tile_size)
+        self.block_id = block_id
+
+class Chunk:
+    def __init__(self, x, blocks):
+        # blocks holds one block id per cell, column by column, top row first
+        self.x = x
+        self.blocks = blocks
+        self.surfaces = {}
+        self.version = 0
+        # Sky and block light levels, laid out like blocks
+        self.light = (bytearray(len(blocks)), bytearray(len(blocks)))
+        # Bumped when a section's light changes, and the stamp each surface was baked with
+        self.light_versions = {}
+        self.stamps = {}
@@ -0,0 +1,184 @@
+import mmap
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from world import World
+
+MAGIC = b'BSWD'
+VERSION = 1
+# magic, version, seed, terrain generator, world height, chunk width
+HEADER = struct.Struct('<4sHQ16sHH')
+# player x, y, lives, stamina, number of inventory entries
+PLAYER = struct.Struct('<iiBfB')
+INVENTORY_ENTRY = struct.Struct('<BI')
+SLOT_HEADER = struct.Struct('<i')
+
+
+class WorldSave:
+    """Keeps a world on disk as a small header file plus a file of chunk slots.
+
+    world.dat holds the seed, generator and player state. chunks.dat is a
+    run of fixed-size slots, each a chunk x followed by that chunk's block
+    ids. Slots are read through a memory map only when their chunk is
+    loaded, and a save rewrites just the chunks that changed since the last
+    one, in place, appending slots for chunks that weren't on disk yet.
+
+    Saves are written on a thread of their own so an autosave never holds
+    up a frame. Chunks handed to it are read back from memory until they
+    have been written.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header_path = os.path.join(path, 'world.dat')
+        self.chunks_path = os.path.join(path, 'chunks.dat')
+        self.chunks_file = None
+        self.map = None
+        self.slots = {}
+        self.slot_size = 0
+        # Guards the map and slots, which the writer changes while chunks are read
+        self.lock = threading.Lock()
+        self.writer = ThreadPoolExecutor(max_workers=1)
+        self.writes = []
+        self.unwritten = {}
+
+    def exists(self):
+        return os.path.exists(self.header_path)
+
+    def read_header(self):
+        with open(self.header_path, 'rb') as file:
+            data = file.read()
+        magic, version, seed, terrain, world_height, chunk_width = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.header_path} is not a version {VERSION} world save")
+        return data, seed, terrain.rstrip(b'\0').decode(), world_height, chunk_width
+
+    def load_world(self, **kwargs):
+        _, seed, terrain, _, _ = self.read_header()
+        return World(seed=seed, terrain=terrain, save=self, **kwargs)
+
+    def load_player(self, player):
+        data = self.read_header()[0]
+        x, y, lives, stamina, entries = PLAYER.unpack_from(data, HEADER.size)
+        player.rect.topleft = (x, y)
+        # A save with no lives left would be game over on every launch, so it starts over with full lives
+        if lives > 0:
+            player.lives = lives
+        player.stamina = stamina
+        # One entry per block slot, an empty slot is a count of 0
+        offset = HEADER.size + PLAYER.size
+        block_slots = len(player.inventory.counts)
+        for slot in range(block_slots):
+            block_id, count = INVENTORY_ENTRY.unpack_from(data, offset) if slot < entries else (0, 0)
+            player.inventory.set_block_slot(slot, block_id, count)
+            offset += INVENTORY_ENTRY.size
+
+    def open(self, world):
+        """Maps chunks.dat and indexes which chunk is in which slot.
+
+        Raises ValueError, before any chunk is read, if the save was made
+        with chunks of another size.
+        """
+        if self.exists():
+            _, _, _, world_height, chunk_width = self.read_header()
+            if (world.world_height, world.chunk_width) != (world_height, chunk_width):
+                raise ValueError(f"{self.path} was saved with {chunk_width}x{world_height} chunks, "
+                                 f"this game uses {world.chunk_width}x{world.world_height}")
+        os.makedirs(self.path, exist_ok=True)
+        self.slot_size = SLOT_HEADER.size + world.chunk_width * world.world_height
+        self.chunks_file = open(self.chunks_path, 'a+b')
+        self.remap()
+        self.slots = {}
+        if self.map is not None:
+            for slot in range(len(self.map) // self.slot_size):
+                chunk_x, = SLOT_HEADER.unpack_from(self.map, slot * self.slot_size)
+                self.slots[chunk_x] = slot
+
+    def remap(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if os.path.getsize(self.chunks_path) > 0:
+            self.map = mmap.mmap(self.chunks_file.fileno(), 0, access=mmap.ACCESS_WRITE)
+
+    def read_chunk(self, chunk_x):
+        with self.lock:
+            blocks = self.unwritten.get(chunk_x)
+            if blocks is not None:
+                return bytearray(blocks)
+            slot = self.slots.get(chunk_x)
+            if slot is None:
+                return None
+            offset = slot * self.slot_size + SLOT_HEADER.size
+            return bytearray(self.map[offset:offset + self.slot_size - SLOT_HEADER.size])
+
+    def save(self, world, player):
+        """Copies the changed chunks and the player, and has the writer thread put them on disk."""
+        # A write that failed is raised here rather than lost
+        for future in [future for future in self.writes if future.done()]:
+            self.writes.remove(future)
+            future.result()
+        chunks = world.take_dirty_chunks()
+        header = self.pack_header(world, player)
+        with self.lock:
+            self.unwritten.update(chunks)
+        self.writes.append(self.writer.submit(self.write, chunks, header))
+
+    def write(self, chunks, header):
+        with self.lock:
+            appended = []
+            for chunk_x, blocks in chunks.items():
+                slot = self.slots.get(chunk_x)
+                if slot is None:
+                    self.slots[chunk_x] = len(self.slots)
+                    appended.append(SLOT_HEADER.pack(chunk_x) + blocks)
+                else:
+                    offset = slot * self.slot_size + SLOT_HEADER.size
+                    self.map[offset:offset + len(blocks)] = blocks
+            if appended:
+                # The file can't grow under a live mapping on every platform
+                if self.map is not None:
+                    self.map.close()
+                    self.map = None
+                self.chunks_file.seek(0, os.SEEK_END)
+                self.chunks_file.write(b''.join(appended))
+                self.chunks_file.flush()
+                self.remap()
+            # A later save may have handed over a newer copy of a chunk
+            for chunk_x, blocks in chunks.items():
+                if self.unwritten.get(chunk_x) is blocks:
+                    del self.unwritten[chunk_x]
+        self.write_header(header)
+
+    def pack_header(self, world, player):
+        inventory = player.inventory.get_block_slots()
+        data = [
+            HEADER.pack(MAGIC, VERSION, world.seed, world.generator.name.encode(), world.world_height, world.chunk_width),
+            PLAYER.pack(player.rect.x, player.rect.y, max(player.lives, 0), player.stamina, len(inventory)),
+        ]
+        data.extend(INVENTORY_ENTRY.pack(block_id, count) for block_id, count in inventory)
+        return b''.join(data)
+
+    def write_header(self, header):
+        # Write the new header beside the old one so a crash never leaves half a file
+        temp_path = self.header_path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(header)
+        os.replace(temp_path, self.header_path)
+
+    def close(self):
+        """Waits for the last save to be written and closes the files."""
+        self.writer.shutdown()
+        writes, self.writes = self.writes, []
+        for future in writes:
+            future.result()
+        if self.map is not None:
+            # Rewritten slots are only synced to disk here, msync can take a while
+            self.map.flush()
+            self.map.close()
+            self.map = None
+        if self.chunks_file is not None:
+            self.chunks_file.close()
+            self.chunks_file = None